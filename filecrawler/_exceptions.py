@@ -31,3 +31,8 @@ class FalsePositiveError(Exception):
     """
     pass
 
+
+
+class ScanTimeoutError(Exception):
+    """Raised by the rule engine when the scanning budget of a file (or of a rule at this file) is exceeded"""
+    pass
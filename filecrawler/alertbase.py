@@ -11,6 +11,7 @@ from re import Pattern
 from typing import Iterator, Optional, TypeVar
 
 from filecrawler.libs.alert import Alert
+from filecrawler.libs.registry import Registry
 from filecrawler.libs.rule import Rule
 from filecrawler.libs.color import Color
 from filecrawler.libs.logger import Logger
@@ -100,19 +101,29 @@ class AlertBase(object):
         if config is None:
             return {}
 
+        from filecrawler.alerts import MANIFEST
+
         base_alerters = AlertBase.get_base_alert()
 
         alerters = {}
 
+        # Declared alerters are imported only when configured
+        for a in MANIFEST:
+            if a['id'] not in config:
+                continue
+
+            if verbose >= 2:
+                Color.pl('{?} Importing alerter: %s' % f'{base_alerters}.{a["module"]}')
+            importlib.import_module(f'{base_alerters}.{a["module"]}')
+
         base_path = os.path.join(
             Path(__file__).resolve().parent, 'alerts'
         )
 
-        for loader, modname, ispkg in pkgutil.walk_packages([base_path]):
-            if not ispkg:
-                if verbose >= 2:
-                    Color.pl('{?} Importing rule: %s' % f'{base_alerters}.{modname}')
-                importlib.import_module(f'{base_alerters}.{modname}')
+        for modname in Registry.get_undeclared(base_path, MANIFEST):
+            if verbose >= 2:
+                Color.pl('{?} Importing alerter: %s' % f'{base_alerters}.{modname}')
+            importlib.import_module(f'{base_alerters}.{modname}')
 
         if verbose:
             Logger.pl('')
@@ -0,0 +1,5 @@
+# Static manifest of the alerters, only the alerters present at the config file are imported
+# (see AlertBase.load_alerters). Keep in sync with the alerter classes, checked by the test suite
+MANIFEST = [
+    dict(id='telegram', module='telegram', qualname='Telegram'),
+]
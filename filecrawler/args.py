@@ -114,12 +114,33 @@ class Arguments(object):
                            type=int,
                            help=Color.s('number of connects in parallel (per host, default: {G}5{W})'))
 
+        flags.add_argument('-P', '--processes',
+                           action='store',
+                           dest='processes',
+                           default=None,
+                           metavar='[processes]',
+                           type=int,
+                           help=Color.s('number of processes to parse files and run the leak rules '
+                                        '(default: {G}0{W}, at the worker threads)'))
+
         flags.add_argument('--create-config',
                            action='store_true',
                            default=False,
                            dest=f'create_config',
                            help=Color.s('Create config sample'))
 
+        flags.add_argument('--force-validation',
+                           action='store_true',
+                           default=False,
+                           dest=f'force_validation',
+                           help=Color.s('Validate all leak rules (true/false positives), ignoring the validation cache'))
+
+        flags.add_argument('--benchmark-rules',
+                           action='store_true',
+                           default=False,
+                           dest=f'benchmark_rules',
+                           help=Color.s('Benchmark all leak rules against adversarial inputs and exit'))
+
         flags.add_argument('--clear-session',
                            action='store_true',
                            default=False,
@@ -138,6 +159,18 @@ class Arguments(object):
                            dest=f'disable_db',
                            help=Color.s('Disable db inserts/checks'))
 
+        flags.add_argument('--incremental',
+                           action='store_true',
+                           default=False,
+                           dest=f'incremental',
+                           help=Color.s('Skip files not changed (device, inode, size, mtime and ctime) since the last crawl'))
+
+        flags.add_argument('--resume',
+                           action='store_true',
+                           default=False,
+                           dest=f'resume',
+                           help=Color.s('Resume an interrupted crawl from the last checkpoint (serial or parallel walker)'))
+
         flags.add_argument('-h', '--help',
                            action='help',
                            help=Color.s('show help message and exit'))
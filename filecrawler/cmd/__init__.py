@@ -0,0 +1,8 @@
+# Static manifest of the command modules, listed without importing them (see CrawlerBase.list_modules).
+# Keep in sync with the module classes, checked by the test suite
+MANIFEST = [
+    dict(name='elastic', description='Integrate to elasticsearch', module='elastic', qualname='Elastic',
+         help_show=True),
+    dict(name='local', description='Save leaks locally', module='local', qualname='Local',
+         help_show=True),
+]
@@ -1,14 +1,20 @@
 import json
 import sys
+import threading
+import time
 from argparse import _ArgumentGroup, Namespace
 from typing import Union
 
 from filecrawler.libs.file import File
 
-from filecrawler._exceptions import IntegrationError
 from filecrawler.config import Configuration
 from filecrawler.crawlerbase import CrawlerBase
+from filecrawler.libs.bloomfilter import BloomFilter
+from filecrawler.libs.bulksink import BulkSink
 from filecrawler.libs.color import Color
+from filecrawler.libs.logger import Logger
+from filecrawler.libs.mgetbatcher import MGetBatcher
+from filecrawler.util.tools import Tools
 from elasticsearch import Elasticsearch
 from urllib.parse import urlparse
 import re
@@ -25,6 +31,19 @@ class Elastic(CrawlerBase):
                       "mime_type", "file_size", "path_virtual", "path_real"]
     _regex_url = None
     _regex_email = None
+    bulk_size = BulkSink.DEFAULT_BULK_SIZE
+    byte_size = BulkSink.DEFAULT_BYTE_SIZE
+    flush_interval = BulkSink.DEFAULT_FLUSH_INTERVAL
+    http_compress = False
+    bulk_load = False
+    force_merge = False
+    _sink = None
+    _bulk_error = None
+    _indexed = None
+    _mget = None
+    _saved_settings = None
+    _client = None
+    _client_lock = threading.Lock()
 
     def __init__(self):
         super().__init__('elastic', 'Integrate to elasticsearch')
@@ -51,9 +70,12 @@ class Elastic(CrawlerBase):
         return {
             'elasticsearch': {
                 'nodes': [{'url': 'http://127.0.0.1:9200'}],
-                #'bulk_size': 200,
-                #'byte_size': '500K',
-                #'flush_interval': '2s'
+                'bulk_size': 200,
+                'byte_size': '500K',
+                'flush_interval': '2s',
+                'http_compress': False,
+                'bulk_load': False,
+                'force_merge': False
             }
         }
 
@@ -87,14 +109,54 @@ class Elastic(CrawlerBase):
                 Color.pl('{!} {R}error parsing elastic nodes: {O}%s{W}\r\n' % str(e))
                 sys.exit(1)
 
+            try:
+                self.bulk_size = int(elasticsearch.get('bulk_size', self.bulk_size))
+                self.byte_size = Tools.parse_size(elasticsearch.get('byte_size', self.byte_size))
+                self.flush_interval = Tools.parse_interval(elasticsearch.get('flush_interval', self.flush_interval))
+                self.http_compress = bool(elasticsearch.get('http_compress', self.http_compress))
+                self.bulk_load = bool(elasticsearch.get('bulk_load', self.bulk_load))
+                self.force_merge = bool(elasticsearch.get('force_merge', self.force_merge))
+            except Exception as e:
+                Color.pl('{!} {R}error parsing elastic bulk options: {O}%s{W}\r\n' % str(e))
+                sys.exit(1)
+
+            if self.bulk_size < 1 or self.byte_size < 1:
+                Color.pl('{!} {R}error: elasticsearch bulk_size and byte_size must be greater than zero{W}\r\n')
+                sys.exit(1)
+
         if self.nodes is None or len(self.nodes) == 0:
             Color.pl('{!} {R}error: invalid elasticsearch nodes. Check configuration file.{W}\r\n')
             sys.exit(1)
 
         return True
 
+    def get_client(self) -> Elasticsearch:
+        '''
+        Process-wide client, its keep-alive connection pool is shared by the crawler and integrator threads
+        '''
+        if Elastic._client is None:
+            with Elastic._client_lock:
+                if Elastic._client is None:
+                    Elastic._client = Elasticsearch(
+                        self.nodes,
+                        connections_per_node=max(Configuration.tasks + Configuration.tasks_integrator, 1),
+                        http_compress=self.http_compress,
+                        request_timeout=30,
+                        max_retries=10,
+                        retry_on_timeout=True
+                    )
+
+        return Elastic._client
+
+    @classmethod
+    def close_client(cls):
+        with Elastic._client_lock:
+            if Elastic._client is not None:
+                Elastic._client.close()
+                Elastic._client = None
+
     def pre_run(self, **data):
-        es = Elasticsearch(self.nodes)
+        es = self.get_client()
         if not es.indices.exists(index=Configuration.index_name):
             request_body = {
                 "settings": {
@@ -119,6 +181,7 @@ class Elastic(CrawlerBase):
                         'filtered_content': {'type': 'text'},
                         'metadata': {'type': 'text'},
                         'has_credential': {'type': 'boolean'},
+                        'scan_truncated': {'type': 'boolean'},
                         'parser': {'type': 'keyword'},
                         'object_content': {'type': 'text'},
                         'info': {'type': 'text'},
@@ -200,6 +263,131 @@ class Elastic(CrawlerBase):
                 body=request_body
             )
 
+        self._saved_settings = self.get_saved_settings(es)
+        if self.bulk_load:
+            self.set_bulk_load(es)
+        elif self._saved_settings is not None:
+            # Left by an interrupted crawl
+            self.restore_settings(es)
+
+        self._indexed = self.load_indexed_ids(es)
+        self._mget = MGetBatcher(es, Configuration.index_name)
+
+        self._sink = BulkSink(
+            es,
+            bulk_size=self.bulk_size,
+            byte_size=self.byte_size,
+            flush_interval=self.flush_interval,
+            concurrency=Configuration.tasks_integrator,
+            on_done=self.set_integrated,
+            on_failed=self.bulk_failed
+        )
+
+    def load_indexed_ids(self, es):
+        '''
+        Bloom filter of the ids already at the index, read from the control index,
+        must_index answers locally the files that are not there
+        '''
+        from elasticsearch.helpers import scan
+
+        ctrl_index = '.ctrl_' + Configuration.index_name
+        try:
+            start = time.time()
+            count = int(es.count(index=ctrl_index).get('count', 0))
+
+            # Room for the files indexed by this crawl
+            ids = BloomFilter(capacity=int(count * 1.2) + 100000)
+            for hit in scan(es, index=ctrl_index, query={'query': {'match_all': {}}}, _source=False, size=10000):
+                ids.add(hit['_id'])
+
+            if Configuration.verbose >= 1 or count > 0:
+                Logger.pl('{+} {C}loaded {O}%s{C} indexed ids in {O}%.1fs{C} (filter of {O}%s{C}){W}' % (
+                    len(ids), time.time() - start, Tools.sizeof_fmt(ids.size_bytes)))
+
+            return ids
+        except Exception as e:
+            # Every file is checked at elasticsearch
+            Color.pl('{!} {O}warning: cannot load the indexed ids of {G}%s{O}: %s{W}' % (ctrl_index, str(e)))
+            return None
+
+    @staticmethod
+    def get_indices() -> list:
+        return [Configuration.index_name, Configuration.index_name + '_credentials', '.ctrl_' + Configuration.index_name]
+
+    @staticmethod
+    def get_saved_settings(es):
+        ''' Original settings of the indices saved by set_bulk_load, None when already restored '''
+        ctrl_index = '.ctrl_' + Configuration.index_name
+        res = es.indices.get_mapping(index=ctrl_index)
+        return res.get(ctrl_index, {}).get('mappings', {}).get('_meta', {}).get('bulk_load_settings', None)
+
+    def set_bulk_load(self, es):
+        '''
+        Bulk load profile: no refresh and no replicas while crawling.
+        The original settings are kept at the control index metadata, so an interrupted crawl restores them later
+        '''
+        indices = Elastic.get_indices()
+        if self._saved_settings is None:
+            res = es.indices.get_settings(index=','.join(indices),
+                                          name=['index.refresh_interval', 'index.number_of_replicas'],
+                                          flat_settings=True)
+            self._saved_settings = {
+                idx: {
+                    'refresh_interval': res.get(idx, {}).get('settings', {}).get('index.refresh_interval', None),
+                    'number_of_replicas': res.get(idx, {}).get('settings', {}).get('index.number_of_replicas', '1'),
+                }
+                for idx in indices
+            }
+            es.indices.put_mapping(index='.ctrl_' + Configuration.index_name,
+                                   meta=dict(bulk_load_settings=self._saved_settings))
+
+        es.indices.put_settings(index=','.join(indices),
+                                settings={'index': {'refresh_interval': '-1', 'number_of_replicas': 0}})
+        Logger.pl('{+} {C}bulk load profile enabled, refresh and replicas disabled while crawling{W}')
+
+    def restore_settings(self, es):
+        indices = Elastic.get_indices()
+        for idx, settings in self._saved_settings.items():
+            # A None refresh_interval goes back to the elasticsearch default
+            es.indices.put_settings(index=idx, settings={'index': settings})
+
+        es.indices.put_mapping(index='.ctrl_' + Configuration.index_name, meta=dict(bulk_load_settings=None))
+        self._saved_settings = None
+
+        es.indices.refresh(index=','.join(indices))
+        Logger.pl('{+} {C}index settings restored{W}')
+
+    def get_status(self) -> str:
+        sink = self._sink
+        if sink is None:
+            return ''
+
+        return f', rate: {sink.rate:.1f}/s (bulk {sink.limit} x {sink.concurrency})'
+
+    def post_run(self, **data):
+        try:
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
+
+            if self._saved_settings is None:
+                return
+
+            es = self.get_client()
+            try:
+                self.restore_settings(es)
+            except Exception as e:
+                Color.pl('{!} {R}error: cannot restore the settings of {G}%s{R}, they are restored at the next crawl: '
+                         '{O}%s{W}' % (Configuration.index_name, str(e)))
+                return
+
+            if self.force_merge:
+                Logger.pl('{+} {C}force merging {O}%s{C}...{W}' % Configuration.index_name)
+                es.options(request_timeout=3600).indices.forcemerge(index=','.join(Elastic.get_indices()),
+                                                                    max_num_segments=1)
+        finally:
+            Elastic.close_client()
+
     def must_index(self, file: Union[File, str]) -> bool:
         try:
             if isinstance(file, File):
@@ -211,72 +399,89 @@ class Elastic(CrawlerBase):
             else:
                 return True
 
-            with(Elasticsearch(self.nodes, timeout=30, max_retries=10, retry_on_timeout=True)) as es:
-                res = es.exists(index=Configuration.index_name, id=id)
-                if res is True:
-                    return False
+            # Never indexed, without asking elasticsearch
+            if self._indexed is not None and id not in self._indexed:
+                return True
 
-            return True
+            return not self._mget.exists(id)
         except (elastic_transport.ConnectionError, requests.exceptions.ConnectionError) as e:
             return True
 
     def integrate(self, **data):
-        try:
+        '''
+        Queue the document, the credentials and the control record of the file at the bulk sink.
+        Returns False, the file stays at the retry backlog until the sink confirms all its actions
+        '''
+        if self._bulk_error is not None:
+            raise Exception(self._bulk_error)
 
-            id = data['fingerprint']
-            if Configuration.filename_as_id:
-                id = data['path_virtual']
-
-            creds = data.get('credentials', None)
-            data['credentials'] = None
-
-            with(Elasticsearch(self.nodes, timeout=30, max_retries=10, retry_on_timeout=True)) as es:
-                res = es.index(index=Configuration.index_name, id=id, document=data)
-                if res is None or res.get('_shards', {}).get('successful', 0) == 0:
-                    if not Configuration.continue_on_error:
-                        raise Exception(f'Cannot insert elasticsearch data: {res}')
-
-                #if res.get('result', '') != 'created':
-                #    Logger.pl(res)
-
-                data['credentials'] = creds
-
-                # Index only credentials
-                findings = CrawlerBase.get_credentials_data(data)
-
-                for k, f in findings.items():
-                    try:
-                        j_data = json.loads(f.get('content', '{}'))
-                        if isinstance(j_data, dict):
-                            f.update({
-                                k1: v1
-                                for k1, v1 in j_data.items()
-                                if k1.lower() in Elastic._CREDS_WHITE_LIST
-                            })
-                    except:
-                        pass
-
-                    try:
-                        # Filter just the first 50 lines
-                        ff = f.get('filtered_file', None)
-                        if ff is not None:
-                            f['filtered_file'] = '\n'.join(ff.split('\n')[0:50])
-                    except:
-                        pass
-
-                    res = es.index(index=Configuration.index_name + '_credentials', id=k, document=f)
-                    if res is None or res.get('_shards', {}).get('successful', 0) == 0:
-                        if not Configuration.continue_on_error:
-                            raise Exception(f'Cannot insert elasticsearch data: {res}')
-
-                es.index(index='.ctrl_' + Configuration.index_name, id=id, document={
-                    k: v
-                    for k, v in data.items()
-                    if k.lower() in Elastic._CONTROL_KEYS
-                })
+        id = data['fingerprint']
+        if Configuration.filename_as_id:
+            id = data['path_virtual']
 
-        except (elastic_transport.ConnectionError, requests.exceptions.ConnectionError) as e:
-            raise IntegrationError(e)
+        if self._sink.is_pending(data['fingerprint']):
+            return False
+
+        creds = data.get('credentials', None)
+        data['credentials'] = None
+
+        actions = [dict(_index=Configuration.index_name, _id=id, _source=dict(data))]
+
+        data['credentials'] = creds
+
+        # Index only credentials
+        findings = CrawlerBase.get_credentials_data(data)
+
+        for k, f in findings.items():
+            try:
+                j_data = json.loads(f.get('content', '{}'))
+                if isinstance(j_data, dict):
+                    f.update({
+                        k1: v1
+                        for k1, v1 in j_data.items()
+                        if k1.lower() in Elastic._CREDS_WHITE_LIST
+                    })
+            except:
+                pass
+
+            try:
+                # Filter just the first 50 lines
+                ff = f.get('filtered_file', None)
+                if ff is not None:
+                    f['filtered_file'] = '\n'.join(ff.split('\n')[0:50])
+            except:
+                pass
+
+            actions.append(dict(_index=Configuration.index_name + '_credentials', _id=k, _source=f))
+
+        actions.append(dict(_index='.ctrl_' + Configuration.index_name, _id=id, _source={
+            k: v
+            for k, v in data.items()
+            if k.lower() in Elastic._CONTROL_KEYS
+        }))
+
+        self._sink.add(data['fingerprint'], actions)
+        if self._indexed is not None:
+            self._indexed.add(id)
+
+        return False
+
+    def bulk_failed(self, failed: dict):
+        retry = 0
+        for fingerprint, info in failed.items():
+            if BulkSink.is_retryable(info):
+                # Rejected or unavailable, sent again from the retry backlog
+                retry += 1
+                continue
+
+            Color.pl('{!} {R}error: Cannot integrate file {G}%s{R}: {O}%s{W}\r\n' % (fingerprint, info['error']))
+            if Configuration.continue_on_error:
+                self.set_integrated([fingerprint])
+            else:
+                self._bulk_error = f'Cannot insert elasticsearch data: {info["error"]}'
+
+        if retry > 0 and Configuration.verbose >= 1:
+            Logger.pl('{*} {GR}elasticsearch bulk: %s files kept to retry{W}' % retry)
 
     def get_emailiter(self, text):
         text = text.encode('utf-8', 'ignore').decode('unicode-escape')
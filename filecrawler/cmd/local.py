@@ -6,12 +6,8 @@ from pathlib import Path
 from filecrawler.config import Configuration
 from filecrawler.crawlerbase import CrawlerBase
 from filecrawler.libs.color import Color
-import requests
-
 from filecrawler.util.tools import Tools
 
-requests.packages.urllib3.disable_warnings()
-
 
 class Local(CrawlerBase):
     nodes = []
@@ -10,6 +10,8 @@ import re
 
 from .alertbase import AlertBase
 from .libs.crawlerdb import CrawlerDB
+from .libs.excludematcher import ExcludeMatcher
+from .libs.hasher import Hasher
 from .parserbase import ParserBase
 from .rulebase import RuleBase
 from filecrawler.libs.color import Color
@@ -37,10 +39,20 @@ class Configuration(object):
     company = []
     tasks = 5
     tasks_integrator = 2
+    walker_threads = 1
     evidences_path = './evidences'
     disable_rules = False
     is_tty = False
     disable_db = False
+    incremental = False
+    resume = False
+    checkpoint_interval = 60
+    hash_algorithm = 'sha1'
+    strict_dedup = False
+    scan_chunk_size = 4 * 1024 * 1024
+    scan_file_timeout = 300
+    scan_rule_timeout = 60
+    processes = 0
 
     public_domains = [
         "hotmail.com", "gmail.com", 'yahoo.com', 'outlook.com', 'terra.com', 'uol.com', 'ibest.com', 'ig.com.br'
@@ -58,6 +70,7 @@ class Configuration(object):
         '*/*.emf', '*/*.bdb', '*/*.vox', '*/*.bin', '*/*.dat', '*/*.pkl',
         '*/*.parquet', '*/*.parq', '*/*.rsc', '*/*.DS_Store'
     ]
+    exclude_matcher = None
     exclude_domains = [
         "hotmail.com", "gmail.com", 'yahoo.com', 'outlook.com', 'terra.com', 'uol.com', 'ibest.com', 'ig.com.br'
         'bol.com'
@@ -160,11 +173,15 @@ class Configuration(object):
             exit(1)
 
         try:
-            RuleBase.list_rules(verbose=Configuration.verbose)
+            RuleBase.list_rules(verbose=Configuration.verbose, force_validation=args.args.force_validation)
         except Exception as e:
             Color.pl('{!} {R}error: failed to load rules: {O}%s{W}\r\n' % str(e))
             exit(1)
 
+        if args.args.benchmark_rules:
+            Configuration.initialized = False
+            sys.exit(0 if Configuration.benchmark_rules() else 1)
+
         if module is None:
             Color.pl('{!} {R}error: missing a mandatory option, use -h help{W}\r\n')
             exit(1)
@@ -208,6 +225,8 @@ class Configuration(object):
         Configuration.disable_rules = args.args.disable_rules
         Configuration.is_tty = os.isatty(sys.__stdout__.fileno())
         Configuration.disable_db = args.args.disable_db
+        Configuration.incremental = args.args.incremental
+        Configuration.resume = args.args.resume
 
         Color.pl('{+} {W}Startup parameters')
         Logger.pl('     {C}command line:{O} %s{W}' % Configuration.cmd_line)
@@ -217,6 +236,7 @@ class Configuration(object):
         Logger.pl('     {C}integrator tasks:{O} %s{W}' % Configuration.tasks_integrator)
         Logger.pl('     {C}leak rules:{O} %s{W}' % ("Enabled" if not Configuration.disable_rules else "Disabled"))
         Logger.pl('     {C}is a tty:{O} %s{W}' % Configuration.is_tty)
+        Logger.pl('     {C}incremental:{O} %s{W}' % ("Enabled" if Configuration.incremental else "Disabled"))
 
         if Configuration.verbose > 0:
             Logger.pl('     {C}verbosity level:{O} %s{W}' % Configuration.verbose)
@@ -299,6 +319,14 @@ class Configuration(object):
                     Configuration.git_support = general.get('git_support', Configuration.git_support)
                     Configuration.extract_files = general.get('extract_files', Configuration.extract_files)
                     Configuration.index_empty_files = general.get('index_empty_files', Configuration.index_empty_files)
+                    Configuration.walker_threads = int(general.get('walker_threads', Configuration.walker_threads))
+                    Configuration.checkpoint_interval = int(general.get('checkpoint_interval', Configuration.checkpoint_interval))
+                    Configuration.hash_algorithm = str(general.get('hash_algorithm', Configuration.hash_algorithm)).lower().strip()
+                    Configuration.strict_dedup = general.get('strict_dedup', Configuration.strict_dedup)
+                    Configuration.scan_chunk_size = int(general.get('scan_chunk_size', Configuration.scan_chunk_size))
+                    Configuration.scan_file_timeout = float(general.get('scan_file_timeout', Configuration.scan_file_timeout))
+                    Configuration.scan_rule_timeout = float(general.get('scan_rule_timeout', Configuration.scan_rule_timeout))
+                    Configuration.processes = int(general.get('processes', Configuration.processes))
 
                     # Lowercase
                     Configuration.excludes = [
@@ -332,10 +360,8 @@ class Configuration(object):
                 Color.pl('{!} {R}error: could not open {G}%s{W}\r\n' % Configuration.config_file)
                 sys.exit(1)
 
-        excluded = next((
-            x for x in Configuration.excludes
-            if Path(Configuration.path.lower()).match(x)
-        ), None)
+        Configuration.exclude_matcher = ExcludeMatcher(Configuration.excludes)
+        excluded = Configuration.exclude_matcher.match(Configuration.path)
 
         if excluded is not None:
             Color.pl('{!} {R}error: the path {G}%s{R} is excluded by {G}%s{W}\r\n' % (Configuration.path, excluded))
@@ -376,6 +402,38 @@ class Configuration(object):
                          Configuration.container_ignore_above)
                 sys.exit(1)
 
+        if Configuration.walker_threads < 1:
+            Configuration.walker_threads = 1
+
+        if Configuration.walker_threads > 64:
+            Configuration.walker_threads = 64
+
+        if Configuration.scan_chunk_size < 65536:
+            Configuration.scan_chunk_size = 65536
+
+        if args.args.processes is not None:
+            Configuration.processes = args.args.processes
+
+        if Configuration.processes < 0:
+            Configuration.processes = 0
+
+        if Configuration.processes > 256:
+            Configuration.processes = 256
+
+        # Worker threads only wait for the scan processes, keep all of them busy
+        if Configuration.processes > Configuration.tasks:
+            Configuration.tasks = Configuration.processes
+
+        if Configuration.hash_algorithm not in Hasher.ALGORITHMS:
+            Color.pl('{!} {R}error: invalid hash_algorithm {G}%s{R}, supported: {O}%s{W}\r\n' %
+                     (Configuration.hash_algorithm, ', '.join(Hasher.ALGORITHMS)))
+            sys.exit(1)
+
+        if not Hasher.is_available(Configuration.hash_algorithm):
+            Color.pl('{!} {R}error: hash_algorithm {G}%s{R} requires the {O}xxhash{R} package{W}\r\n' %
+                     Configuration.hash_algorithm)
+            sys.exit(1)
+
         db_name = Path(f'{base_path}/filecrawler.db')
         if args.args.db_file.strip() != '':
             db_name = Path(args.args.db_file.strip())
@@ -389,7 +447,13 @@ class Configuration(object):
 
         try:
             with(CrawlerDB(auto_create=True, db_name=Configuration.db_name)) as db:
-                pass
+                # Keep the fingerprints of an existing index comparable
+                hash_algorithm = db.get_hash_algorithm(Configuration.index_name)
+                if hash_algorithm is not None and hash_algorithm != Configuration.hash_algorithm:
+                    Color.pl(('{!} {O}Warning:{W} index {G}%s{W} was created with {G}%s{W} fingerprints, '
+                              'ignoring hash_algorithm {O}%s{W}') %
+                             (Configuration.index_name, hash_algorithm, Configuration.hash_algorithm))
+                    Configuration.hash_algorithm = hash_algorithm
         except sqlite3.OperationalError as e:
             Logger.pl(
                 '{!} {R}error: the database file exists but is not an SQLite or table structure was not created.{W}\r\n')
@@ -400,6 +464,10 @@ class Configuration(object):
         Logger.pl('     {C}evidences path:{O} %s{W}' % Configuration.evidences_path)
 
         Logger.pl('     {C}index path:{O} %s{W}' % Configuration.path)
+        Logger.pl('     {C}walker tasks:{O} %s{W}' % Configuration.walker_threads)
+        Logger.pl('     {C}hash algorithm:{O} %s{W}' % Configuration.hash_algorithm)
+        Logger.pl('     {C}scan processes:{O} %s{W}' % (
+            Configuration.processes if Configuration.processes > 0 else 'Disabled (worker threads)'))
 
         if Configuration.git_support:
             git_ver = Tools.get_git_version()
@@ -419,6 +487,35 @@ class Configuration(object):
 
         Logger.pl('  ')
 
+    @staticmethod
+    def benchmark_rules() -> bool:
+        from .libs.rulebenchmark import RuleBenchmark
+
+        Logger.pl('{+} {C}benchmarking leak rules (worst-case budget {O}%ss{C} per input)...{W}' %
+                  RuleBenchmark.DEFAULT_BUDGET)
+
+        def print_result(r):
+            if Configuration.verbose > 0:
+                Logger.pl('{?} {W}{D}%s: worst %ss (%s){W}' % (r['rule'], r['worst_time'], r['worst_input']))
+
+        bench = RuleBenchmark(RuleBase.list_rules())
+        results = bench.run(callback=print_result)
+        Logger.pl(Tools.get_tabulated(results))
+
+        failures = bench.get_failures(results)
+        for r in failures:
+            Color.pl('{!} {R}error: rule {O}%s{R} took {O}%ss{R} to scan the input {O}%s{W}' % (
+                r['rule'], r['worst_time'], r['worst_input']))
+
+        return len(failures) == 0
+
+    @staticmethod
+    def get_exclude_matcher() -> ExcludeMatcher:
+        if Configuration.exclude_matcher is None:
+            Configuration.exclude_matcher = ExcludeMatcher(Configuration.excludes)
+
+        return Configuration.exclude_matcher
+
     @staticmethod
     def print_config():
         with open(Configuration.config_file, 'r') as f:
@@ -473,7 +570,15 @@ class Configuration(object):
                     'enabled': Configuration.ocr_enabled,
                     'pdf_strategy': Configuration.ocr_pdf_strategy,
                 },
-                'follow_symlinks': Configuration.follow_symlinks
+                'follow_symlinks': Configuration.follow_symlinks,
+                'walker_threads': Configuration.walker_threads,
+                'checkpoint_interval': Configuration.checkpoint_interval,
+                'hash_algorithm': Configuration.hash_algorithm,
+                'strict_dedup': Configuration.strict_dedup,
+                'scan_chunk_size': Configuration.scan_chunk_size,
+                'scan_file_timeout': Configuration.scan_file_timeout,
+                'scan_rule_timeout': Configuration.scan_rule_timeout,
+                'processes': Configuration.processes
             }
         }
 
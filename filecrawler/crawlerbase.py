@@ -11,24 +11,28 @@ import pkgutil
 import random
 import string
 from argparse import _ArgumentGroup, ArgumentParser, Namespace
-from typing import Union
+from typing import Optional, Union
 
-from filecrawler._exceptions import IntegrationError
 from filecrawler.alertbase import AlertBase
 from filecrawler.libs.module import Module
+from filecrawler.libs.registry import Registry
 
 from filecrawler.config import Configuration
 from filecrawler.gitfinder import GitFinder
+from filecrawler.libs.checkpoint import Checkpoint
 from filecrawler.libs.containerfile import ContainerFile
 from filecrawler.libs.cpath import CPath
 from filecrawler.libs.file import File
+from filecrawler.libs.rulestats import RuleStats
+from filecrawler.libs.scanbudget import ScanBudget
+from filecrawler.libs.scanpool import ScanPool
 from filecrawler.libs.slice import Slice
+from filecrawler.libs.walker import Walker, ParallelWalker
 from filecrawler.libs.worker import Worker
 from filecrawler.parserbase import ParserBase
 from filecrawler.libs.color import Color
 from filecrawler.libs.crawlerdb import CrawlerDB
 from filecrawler.libs.logger import Logger
-from filecrawler.parsers.intelxinfo import IntelXInfo
 from filecrawler.util.tools import Tools
 
 
@@ -49,6 +53,8 @@ class CrawlerBase(object):
     integrated = 0
     index_id = -1
     index_name = 'file_crawler'
+    checkpoint = None
+    scan_pool = None
 
     def __init__(self, name, description, help_show=True):
         self.name = name
@@ -58,11 +64,37 @@ class CrawlerBase(object):
         pass
 
     def integrate(self, **data):
+        '''
+        Send the file data to the integration. Returns False when the data was only queued (bulk),
+        the file stays at the retry backlog until the integration confirms it (see set_integrated)
+        '''
         raise Exception('Method "integrate" is not yet implemented.')
 
     def pre_run(self, **data):
         raise Exception('Method "integrate" is not yet implemented.')
 
+    def post_run(self, **data):
+        pass
+
+    def get_status(self) -> str:
+        ''' Extra text of the status line '''
+        return ''
+
+    def set_integrated(self, fingerprints: list):
+        ''' Confirm files queued by integrate, removing them from the retry backlog '''
+        CrawlerBase.integrated += len(fingerprints)
+        if Configuration.disable_db or len(fingerprints) == 0:
+            return
+
+        with(CrawlerDB(auto_create=False, db_name=Configuration.db_name)) as db:
+            for i in range(5):
+                try:
+                    db.set_integrated(self.index_id, fingerprints)
+                    break
+                except sqlite3.OperationalError as e:
+                    if 'locked' in str(e):
+                        time.sleep(1)
+
     @classmethod
     def write_status(cls, text):
         print(text, file=CrawlerBase._stderr, end='\r', flush=True)
@@ -96,25 +128,38 @@ class CrawlerBase(object):
     @classmethod
     def list_modules(cls, help_show=True, verbose=False) -> dict:
         try:
+            from filecrawler.cmd import MANIFEST
 
             base_module = CrawlerBase.get_base_module()
 
             modules = {}
 
+            # Declared modules are imported only when selected
+            for m in MANIFEST:
+                if m['help_show'] is True or help_show is True:
+                    modules[m['name']] = Module(
+                        name=m['name'].lower(),
+                        description=m['description'],
+                        module=f'{base_module}.{m["module"]}',
+                        qualname=m['qualname'],
+                    )
+
             base_path = os.path.join(
                 Path(__file__).resolve().parent, 'cmd'
             )
 
-            for loader, modname, ispkg in pkgutil.walk_packages([base_path]):
-                if not ispkg:
-                    if verbose:
-                        Color.pl('{?} Importing module: %s' % f'{base_module}.{modname}')
-                    importlib.import_module(f'{base_module}.{modname}')
+            for modname in Registry.get_undeclared(base_path, MANIFEST):
+                if verbose:
+                    Color.pl('{?} Importing module: %s' % f'{base_module}.{modname}')
+                importlib.import_module(f'{base_module}.{modname}')
 
             if verbose:
                 Logger.pl('')
 
             for iclass in CrawlerBase.__subclasses__():
+                if Registry.is_declared(iclass, base_module, MANIFEST):
+                    continue
+
                 t = iclass()
                 if t.name in modules:
                     raise Exception(f'Duplicated Module name: {iclass.__module__}.{iclass.__qualname__}')
@@ -180,9 +225,12 @@ class CrawlerBase(object):
             # Insert/get index name
             self.index_id = db.insert_or_get_index(Configuration.index_name)
 
-            # Clear data of files
+            # Clear data of integrated files, the others are sent again from the retry backlog
             db.delete('alert', index_id=self.index_id)
-            db.select_raw(sql="update file_index set data='' where index_id = ?", args=[self.index_id])
+            db.select_raw(sql="update file_index set data='' where index_id = ? and integrated = 1",
+                          args=[self.index_id])
+
+            self.checkpoint = self.load_checkpoint(db)
 
         self.pre_run()
 
@@ -204,10 +252,24 @@ class CrawlerBase(object):
                 t2.daemon = True
                 t2.start()
 
+                if self.checkpoint is not None:
+                    t3 = threading.Thread(target=self.checkpoint_saver,
+                                          kwargs=dict(worker=t))
+                    t3.daemon = True
+                    t3.start()
+
+                if Configuration.processes > 0:
+                    Logger.pl('{+} {C}starting {O}%s{C} scan processes{W}' % Configuration.processes)
+                    CrawlerBase.scan_pool = ScanPool(Configuration.processes)
+
+                finished = False
                 try:
 
                     fl_count = 0
-                    for f in self._list_objects(base_path=Path(Configuration.path), path=Path(Configuration.path)):
+                    walker = self.get_walker(base_path=Path(Configuration.path), parallel=True,
+                                             checkpoint=self.checkpoint)
+                    pending, partial = self.checkpoint.snapshot() if self.checkpoint is not None else (None, None)
+                    for f in walker.walk(pending=pending, partial=partial):
                         if not t.running or not ing.running:
                             break
 
@@ -220,8 +282,22 @@ class CrawlerBase(object):
                     Logger.pl('{+} {C}file list finished with {O}%s{C} files, waiting processors...{W}' % fl_count)
 
                     t.wait_finish()
+
+                    # Files left by the previous crawls are sent before finishing as well
+                    with(CrawlerDB(auto_create=False, db_name=Configuration.db_name)) as db:
+                        for i in range(5):
+                            try:
+                                self.add_backlog(db, ing)
+                                break
+                            except sqlite3.OperationalError as e:
+                                if 'locked' not in str(e):
+                                    raise e
+                                time.sleep(1)
+
                     ing.wait_finish()
 
+                    finished = t.running and ing.running
+
                     Color.clear_entire_line()
                     Logger.pl('{+} {C}processors finished!{W}')
 
@@ -231,6 +307,80 @@ class CrawlerBase(object):
                     t.close()
                     ing.close()
 
+                    if CrawlerBase.scan_pool is not None:
+                        CrawlerBase.scan_pool.close()
+                        CrawlerBase.scan_pool = None
+
+                    self.post_run()
+
+                    if self.checkpoint is not None:
+                        with(CrawlerDB(auto_create=False, db_name=Configuration.db_name)) as db:
+                            if finished:
+                                db.delete_checkpoint(self.index_id)
+                            else:
+                                self.save_checkpoint(db)
+                                Logger.pl('{+} {C}crawl checkpoint saved, use {O}--resume{C} to continue{W}')
+
+        self.print_rule_stats()
+
+    def print_rule_stats(self):
+        if Configuration.disable_rules:
+            return
+
+        stats = RuleStats.get_stats()
+        if len(stats) == 0:
+            return
+
+        try:
+            Logger.pl('{+} {C}rule statistics:{W}')
+            Logger.pl(Tools.get_tabulated(stats))
+            file_name = RuleStats.save(Path(Configuration.evidences_path) / 'rule_stats.json', stats)
+            if file_name is not None:
+                Logger.pl('{+} {C}rule statistics saved at {O}%s{W}' % file_name)
+        except Exception as e:
+            Tools.print_error(e)
+
+    def load_checkpoint(self, db: CrawlerDB) -> Optional[Checkpoint]:
+        if Configuration.disable_db:
+            return None
+
+        if Configuration.resume:
+            data = db.get_checkpoint(self.index_id)
+            if data is not None and data['root'] == Configuration.path:
+                Logger.pl('{+} {C}resuming crawl with {O}%s{C} pending and {O}%s{C} partial directories{W}' % (
+                    len(data['pending']), len(data['partial'])))
+                return Checkpoint(Configuration.path, pending=data['pending'], partial=data['partial'])
+
+            Color.pl('{!} {O}Warning:{W} checkpoint not found for path {G}%s{W}, starting a new crawl' %
+                     Configuration.path)
+
+        db.delete_checkpoint(self.index_id)
+        return Checkpoint(Configuration.path, pending=[Configuration.path])
+
+    def save_checkpoint(self, db: CrawlerDB):
+        pending, partial = self.checkpoint.snapshot()
+        for i in range(5):
+            try:
+                db.save_checkpoint(self.index_id, self.checkpoint.root, pending, partial)
+                break
+            except sqlite3.OperationalError as e:
+                if 'locked' in str(e):
+                    time.sleep(1)
+
+    def checkpoint_saver(self, worker):
+        try:
+            with(CrawlerDB(auto_create=False,
+                           db_name=Configuration.db_name)) as db:
+                last = time.time()
+                while worker.running:
+                    time.sleep(0.3)
+                    if time.time() - last >= Configuration.checkpoint_interval:
+                        self.save_checkpoint(db)
+                        last = time.time()
+
+        except Exception as e:
+            Tools.print_error(e)
+
     @staticmethod
     def ignore(file: File) -> bool:
         if file is None:
@@ -271,15 +421,7 @@ class CrawlerBase(object):
                 if size > Configuration.max_size:
                     return True
 
-        ignore = next((
-            True for x in [
-            x1 for x1 in Configuration.excludes
-            if x1 not in include
-        ]
-            if Path(str(i_path).lower()).match(x)
-        ), False)
-
-        return ignore
+        return Configuration.get_exclude_matcher().without(include).is_excluded(str(i_path))
 
     def must_index(self, file: Union[File, str]) -> bool:
         return True
@@ -289,16 +431,27 @@ class CrawlerBase(object):
                          db_name=Configuration.db_name)
 
     def file_callback(self, worker, entry, thread_callback_data, thread_count, **kwargs):
+        item = entry
         try:
+            if isinstance(entry, Walker.Entry):
+                entry = entry.create_instance()
+
             if isinstance(entry, File):
                 self.process_file(db=thread_callback_data, file=entry)
             elif isinstance(entry, CPath):
                 self.process_path(db=thread_callback_data, path=entry)
+
+            self.checkpoint_done(item)
         except KeyboardInterrupt as e:
             worker.close()
         except Exception as e:
+            self.checkpoint_done(item)
             Tools.print_error(e)
 
+    def checkpoint_done(self, entry):
+        if self.checkpoint is not None and isinstance(entry, Walker.Entry):
+            self.checkpoint.done(entry)
+
     def status(self, text, sync):
         try:
 
@@ -323,7 +476,8 @@ class CrawlerBase(object):
                     lbl = "[=====]"
 
                 self.write_status(
-                    f' {text} {lbl} read: {CrawlerBase.read}, ignored: {CrawlerBase.ignored}, integrated: {CrawlerBase.integrated}')
+                    f' {text} {lbl} read: {CrawlerBase.read}, ignored: {CrawlerBase.ignored}, integrated: {CrawlerBase.integrated}'
+                    f'{self.get_status()}')
                 time.sleep(0.3)
         except KeyboardInterrupt as e:
             raise e
@@ -356,11 +510,10 @@ class CrawlerBase(object):
                         data = json.loads(data)
 
                         try:
-                            self.integrate(**data)
+                            if self.integrate(**data) is False:
+                                # Queued, kept at the backlog until confirmed
+                                return
                             CrawlerBase.integrated += 1
-                        except IntegrationError:
-                            time.sleep(0.3)
-                            return
                         except Exception as e:
                             if not Configuration.continue_on_error:
                                 Color.pl(
@@ -390,13 +543,7 @@ class CrawlerBase(object):
                         time.sleep(0.3)
 
                     try:
-                        rows = db.select_raw(
-                            sql='select file_id from [file_index] where integrated = 0 order by indexing_date limit 1000',
-                            args=[]
-                        )
-                        if rows is not None and len(rows) > 0:
-                            for r in rows:
-                                worker.add_item(int(r['file_id']))
+                        self.add_backlog(db, worker)
                     except sqlite3.OperationalError as e:
                         if 'locked' in str(e):
                             time.sleep(5)
@@ -408,38 +555,72 @@ class CrawlerBase(object):
         except Exception as e:
             Tools.print_error(e)
 
+    def update_file_data(self, db: CrawlerDB, file_id: int, integrated: int, data: str = ''):
+        ''' Integration state of the file, the data is kept only while it is at the retry backlog '''
+        if Configuration.disable_db or file_id is None:
+            return
+
+        for i in range(5):
+            try:
+                db.update('file_index',
+                          filter_data=dict(file_id=file_id),
+                          **dict(
+                              integrated=integrated,
+                              data=data if not integrated else ''
+                          )
+                )
+                break
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e):
+                    raise e
+                time.sleep(1)
+
+    def add_backlog(self, db: CrawlerDB, worker):
+        ''' Queue the files not integrated yet (retry backlog) at the integrator '''
+        rows = db.select_raw(
+            sql='select file_id from [file_index] where integrated = 0 order by indexing_date limit 1000',
+            args=[]
+        )
+        if rows is not None and len(rows) > 0:
+            for r in rows:
+                worker.add_item(int(r['file_id']))
+
+    def get_walker(self, base_path: Path, container_path: File = None, parallel: bool = False,
+                   checkpoint: Checkpoint = None) -> Walker:
+        # Only the main walk is parallel and tracked by the checkpoint, with any number of walker threads
+        if parallel and Configuration.walker_threads > 1:
+            return ParallelWalker(
+                base_path=base_path,
+                excludes=Configuration.get_exclude_matcher(),
+                git_support=Configuration.git_support,
+                follow_symlinks=Configuration.follow_symlinks,
+                container_path=container_path,
+                on_error=self.walker_error_callback,
+                checkpoint=checkpoint,
+                threads=Configuration.walker_threads
+            )
+
+        return Walker(
+            base_path=base_path,
+            excludes=Configuration.get_exclude_matcher(),
+            git_support=Configuration.git_support,
+            follow_symlinks=Configuration.follow_symlinks,
+            container_path=container_path,
+            on_error=self.walker_error_callback,
+            checkpoint=checkpoint
+        )
+
+    def walker_error_callback(self, path: str, error: OSError):
+        if not Configuration.continue_on_error:
+            raise error
+
+        if Configuration.verbose >= 1:
+            Tools.print_error(Exception(f'Error listing path: {path}', str(error)))
+
     def _list_objects(self, base_path: Path, path: Path, recursive: bool = True, container_path: File = None):
-        here = str(path.resolve())
-        files = [
-            Path(os.path.join(here, name)).resolve()
-            for name in os.listdir(here)
-            if os.path.isfile(os.path.join(here, name))
-        ]
-
-        info = IntelXInfo(here)
-
-        for f in files:
-            yield File(base_path, f, container_path, info=info.get_info(f))
-
-        if os.path.isdir(os.path.join(here, '.git')) and Configuration.git_support:
-            yield CPath(base_path, Path(os.path.join(here, '.git')).resolve(), container_path)
-
-        if recursive:
-            dirs = [
-                Path(os.path.join(here, name)).resolve()
-                for name in os.listdir(here)
-                if os.path.isdir(os.path.join(here, name)) and next((
-                    False for x in Configuration.excludes
-                    if Path(str(os.path.join(here, name)).lower()).match(x)
-                    ), True)
-            ]
-
-            for d in dirs:
-                yield from self._list_objects(
-                    base_path=base_path,
-                    path=d,
-                    recursive=recursive,
-                    container_path=container_path)
+        walker = self.get_walker(base_path=base_path, container_path=container_path)
+        for entry in walker.walk(path=path, recursive=recursive):
+            yield entry.create_instance()
 
     def process_path(self, db: CrawlerDB, path: CPath):
         if path.name == '.git' and Configuration.git_support:
@@ -469,7 +650,9 @@ class CrawlerBase(object):
                     if tmp is not None:
                         f_data.update(**tmp)
 
-                        creds = parser.lookup_credentials(f_data.get('content', bytes()))
+                        budget = self.get_scan_budget()
+                        creds = parser.lookup_credentials(f_data.get('content', bytes()), budget=budget)
+                        self.check_scan_budget(f_data['path_virtual'], f_data, budget)
                         if creds is not None:
                             f_data.update(creds)
 
@@ -490,6 +673,34 @@ class CrawlerBase(object):
                     if isinstance(b64_data, bytes):
                         b64_data = b64_data.decode("utf-8")
 
+                    # Stored at the backlog before sending, a queued file may be confirmed before integrate returns
+                    row = None
+                    last_error = None
+                    for i in range(50):
+                        try:
+                            row = db.insert_or_get_file(
+                                **f_data,
+                                index_id=self.index_id,
+                                integrated=0,
+                                data=b64_data,
+                                hash_algorithm=Configuration.hash_algorithm
+                            )
+                            if row is None:
+                                last_error = Exception('database register is none')
+                            break
+                        except sqlite3.OperationalError as e:
+                            last_error = e
+                            if 'locked' in str(e):
+                                time.sleep(0.5 * float(i))
+                                if i >= 20:
+                                    db.reconnect()
+                    if row is None:
+                        if not Configuration.continue_on_error:
+                            Color.pl(
+                                '{!} {R}error: Cannot insert file {G}%s{R}: {O}%s{W}\r\n' % (path.path_real, str(last_error)))
+                            raise KeyboardInterrupt()
+                        continue
+
                     # try to send in a first attempt
                     integrated = 0
                     try:
@@ -502,43 +713,25 @@ class CrawlerBase(object):
 
                         f_data['content'] = f_data.get('content', '').strip('\n\t ')
 
+                        queued = False
                         if not Configuration.index_empty_files and \
                                 (f_data.get('content', None) is None or len(f_data.get('content', '')) == 0):
                             CrawlerBase.ignored += 1
+                        elif self.integrate(**f_data) is False:
+                            # Kept at the backlog until confirmed
+                            queued = True
                         else:
-                            self.integrate(**f_data)
                             CrawlerBase.integrated += 1
 
-                        integrated = 1
-                        b64_data = ''
+                        if not queued:
+                            integrated = 1
                     except Exception as e:
                         if Configuration.verbose >= 4:
                             Tools.print_error(Exception(f'Error integrating git data from: {path.path_virtual}', str(e)))
                         pass
 
-                    row = None
-                    last_error = None
-                    for i in range(50):
-                        try:
-                            row = db.insert_or_get_file(
-                                **f_data,
-                                index_id=self.index_id,
-                                integrated=integrated,
-                                data=b64_data
-                            )
-                            if row is None:
-                                last_error = Exception('database register is none')
-                            break
-                        except sqlite3.OperationalError as e:
-                            last_error = e
-                            if 'locked' in str(e):
-                                time.sleep(0.5 * float(i))
-                                if i >= 20:
-                                    db.reconnect()
-                    if row is None and not Configuration.continue_on_error:
-                        Color.pl(
-                            '{!} {R}error: Cannot insert file {G}%s{R}: {O}%s{W}\r\n' % (path.path_real, str(last_error)))
-                        raise KeyboardInterrupt()
+                    if integrated:
+                        self.update_file_data(db, row.get('file_id', None), integrated=1)
             except KeyboardInterrupt as e:
                 raise e
             except Exception as e:
@@ -546,15 +739,64 @@ class CrawlerBase(object):
                     Tools.print_error(Exception(f'Error getting git data from: {path.path_virtual}', e))
 
     def process_file(self, db: CrawlerDB, file: File):
+        # Files inside of containers are extracted to a new temp path at every run
+        incremental = Configuration.incremental and not Configuration.disable_db and file.container_path is None
+
+        if incremental and db.is_file_unchanged(self.index_id, file):
+            CrawlerBase.ignored += 1
+            if Configuration.verbose >= 3:
+                Color.pl('{*} {GR}file unchanged %s{W}' % file.path_virtual)
+            return
+
+        processed = self._process_file(db=db, file=file)
+
+        # Failed files are not recorded, so the next incremental crawl processes them again
+        if incremental and processed:
+            for i in range(5):
+                try:
+                    db.insert_or_update_file_stat(self.index_id, file)
+                    break
+                except sqlite3.OperationalError as e:
+                    if 'locked' not in str(e):
+                        raise e
+                    time.sleep(1)
+
+    def is_sample_duplicate(self, db: CrawlerDB, file: File) -> bool:
+        # Huge files are probed by the sample fingerprint, the full hash is calculated only for new samples
+        if Configuration.strict_dedup:
+            return False
+
+        sample = file.sample_fingerprint
+        if sample is None:
+            return False
+
+        return db.select_count('file_index', index_id=self.index_id, sample_fingerprint=sample) > 0
+
+    def _process_file(self, db: CrawlerDB, file: File) -> bool:
+        ''' Returns True when the file is indexed, queued to the integration or already indexed '''
 
         if Configuration.verbose >= 3:
             Color.pl('{*} {GR}processing %s{W}' % file.path_virtual)
 
+        # Checked before the sample probe and must_index, which read the file to get its fingerprints
+        container = ContainerFile.is_container(file)
+        if not container and CrawlerBase.ignore(file):
+            CrawlerBase.ignored += 1
+            if Configuration.verbose >= 3:
+                Color.pl('{*} {GR}file ignored %s{W}' % file.path_virtual)
+            return False
+
+        if self.is_sample_duplicate(db=db, file=file):
+            CrawlerBase.ignored += 1
+            if Configuration.verbose >= 3:
+                Color.pl('{*} {GR}file sample already indexed %s{W}' % file.path_virtual)
+            return True
+
         if not self.must_index(file=file):
             CrawlerBase.ignored += 1
-            return
+            return True
 
-        if ContainerFile.is_container(file):
+        if container:
             if Configuration.verbose >= 3:
                 Color.pl('{*} {GR}container file %s{W}' % file.path_virtual)
             with(ContainerFile(file)) as container:
@@ -566,19 +808,15 @@ class CrawlerBase(object):
                         elif isinstance(f, CPath):
                             self.process_path(db=db, path=f)
 
-        else:
+            processed = out_path is not None
 
-            if CrawlerBase.ignore(file):
-                CrawlerBase.ignored += 1
-                if Configuration.verbose >= 3:
-                    Color.pl('{*} {GR}file ignored %s{W}' % file.path_virtual)
-                return
+        else:
 
             CrawlerBase.read += 1
 
             if db.select_count('file_index', index_id=self.index_id, fingerprint=file.fingerprint) > 0:
                 CrawlerBase.ignored += 1
-                return
+                return True
 
             row = None
             last_error = None
@@ -588,6 +826,8 @@ class CrawlerBase(object):
                         **file.db_dict,
                         index_id=self.index_id,
                         integrated=1,  # To not try to integrate without content
+                        hash_algorithm=Configuration.hash_algorithm,
+                        sample_fingerprint=file.sample_fingerprint
                     )
                     if row is None:
                         last_error = Exception('database register is none')
@@ -604,6 +844,7 @@ class CrawlerBase(object):
                     '{!} {R}error: Cannot insert file {G}%s{R}: {O}%s{W}\r\n' % (file.path_real, str(last_error)))
                 raise KeyboardInterrupt()
 
+            processed = row is not None
             if row is not None and row['inserted']:
                 #Logger.pl(file.path_virtual)
                 #Process file content
@@ -611,12 +852,16 @@ class CrawlerBase(object):
                 data = file.db_dict
                 data.update(dict(parser=parser.name))
 
-                tmp = parser.parse(file)
+                if CrawlerBase.scan_pool is not None:
+                    tmp, creds, budget = CrawlerBase.scan_pool.run(CrawlerBase.scan_file, file)
+                else:
+                    tmp, creds, budget = CrawlerBase.scan_file(file)
+
                 if tmp is not None:
                     data.update(**tmp)
 
-                    if not Configuration.disable_rules:
-                        creds = parser.lookup_credentials(data.get('content', ''))
+                    if budget is not None:
+                        self.check_scan_budget(file.path_virtual, data, budget)
                         if creds is not None:
                             data.update(creds)
 
@@ -638,8 +883,12 @@ class CrawlerBase(object):
                 if isinstance(b64_data, bytes):
                     b64_data = b64_data.decode("utf-8")
 
+                # Stored at the backlog before sending, a queued file may be confirmed before integrate returns
+                self.update_file_data(db, row['file_id'], integrated=0, data=b64_data)
+
                 # try to send in a first attempt
                 integrated = 0
+                queued = False
                 try:
 
                     if isinstance(data.get('content', ''), bytes):
@@ -653,34 +902,62 @@ class CrawlerBase(object):
                     if not Configuration.index_empty_files and \
                             (data.get('content', None) is None or len(data.get('content', '')) == 0):
                         CrawlerBase.ignored += 1
-                    else:
-                        self.integrate(**data)
+                    elif self.integrate(**data) is False:
+                        # Kept at the backlog until confirmed
+                        queued = True
 
-                    integrated = 1
-                    b64_data = ''
+                    if not queued:
+                        integrated = 1
                 except:
                     pass
 
-                if not Configuration.disable_db:
-                    for i in range(5):
-                        try:
-                            db.update('file_index',
-                                      filter_data=dict(file_id=row['file_id']),
-                                      **dict(
-                                          integrated=integrated,
-                                          data=b64_data if not integrated else ''
-                                      )
-                            )
-                            break
-                        except sqlite3.OperationalError as e:
-                            if 'locked' in str(e):
-                                time.sleep(1)
+                if integrated:
+                    self.update_file_data(db, row['file_id'], integrated=1)
 
                 CrawlerBase.integrated += integrated
+                processed = integrated == 1 or queued
 
         if Configuration.verbose >= 3:
             Color.pl('{*} {GR}finishing processor for %s{W}' % file.path_virtual)
 
+        return processed
+
+    @staticmethod
+    def scan_file(file: File) -> tuple:
+        '''
+        Parse and rule detection of the file, executed at the scan processes when enabled.
+        Returns the parsed data, the credentials found and the ScanBudget (None when rules are disabled)
+        '''
+        parser = ParserBase.get_parser_instance(file.extension, file.mime)
+        tmp = parser.parse(file)
+        if tmp is None or Configuration.disable_rules:
+            return tmp, None, None
+
+        budget = CrawlerBase.get_scan_budget()
+        if parser.stream_scan and file.size > Configuration.scan_chunk_size:
+            # Whole file scanned in chunks, not only the indexed chars
+            creds = parser.lookup_credentials_stream(file, budget=budget)
+        else:
+            creds = parser.lookup_credentials(tmp.get('content', ''), budget=budget)
+        budget.finish()
+
+        return tmp, creds, budget
+
+    @staticmethod
+    def get_scan_budget() -> ScanBudget:
+        return ScanBudget(file_timeout=Configuration.scan_file_timeout, rule_timeout=Configuration.scan_rule_timeout)
+
+    @staticmethod
+    def check_scan_budget(file_path: str, data: dict, budget: ScanBudget):
+        data.update(dict(scan_truncated=budget.truncated))
+        if not budget.truncated:
+            return
+
+        Logger.pl('{!} {O}Warning:{W} rule scan truncated after {O}%.1fs{W} at {G}%s{W} (%s)' % (
+            budget.elapsed, file_path,
+            'file budget exceeded' if budget.file_truncated else
+            'rules: %s' % ', '.join(sorted(budget.truncated_rules))))
+
     def save_credential(self, db: CrawlerDB, file_path: str, data: dict):
         if data is None or len(data) == 0:
             return
@@ -1,12 +1,11 @@
 import datetime
-import hashlib
 import json
 import os
 from pathlib import Path
 from typing import Iterator
-import git
 
 from filecrawler.libs.cpath import CPath
+from filecrawler.libs.hasher import Hasher
 from filecrawler.util.tools import Tools
 
 
@@ -17,6 +16,8 @@ class GitFinder(object):
     _EMPTY_TREE_SHA = "4b825dc642cb6eb9a060e54bf8d69288fbee4904"
 
     def __init__(self, git_path: CPath):
+        import git
+
         self._git_path = git_path
         self._repo = git.Repo(self._git_path.path)
 
@@ -71,7 +72,7 @@ class GitFinder(object):
                                 fingerprint=self._diff_fingerprint(stats, 'a'),
                                 filename=opath.name,
                                 extension=opath.suffix.strip('. '),
-                                mime_type=Tools.get_mimes(bdata_a),
+                                mime_type=Tools.get_mimes(bdata_a, extension=opath.suffix),
                                 file_size=diff.a_blob.size,
                                 created=commit.authored_datetime,
                                 last_accessed=commit.authored_datetime,
@@ -90,7 +91,7 @@ class GitFinder(object):
                                     fingerprint=self._diff_fingerprint(stats, 'b'),
                                     filename=opath.name,
                                     extension=opath.suffix.strip('. '),
-                                    mime_type=Tools.get_mimes(bdata_b),
+                                    mime_type=Tools.get_mimes(bdata_b, extension=opath.suffix),
                                     file_size=diff.b_blob.size,
                                     created=commit.authored_datetime,
                                     last_accessed=commit.authored_datetime,
@@ -107,11 +108,11 @@ class GitFinder(object):
                             Tools.print_error(Exception(f'Error parsing git data from: {self._git_path}', str(e)))
 
     def _diff_fingerprint(self, stats, salt: str = ''):
-        sha1sum = hashlib.sha1()
-        sha1sum.update(f'{self._git_path}_{salt}'.encode("utf-8"))
-        sha1sum.update(json.dumps(stats, default=Tools.json_serial).encode("utf-8"))
+        hashsum = Hasher.new()
+        hashsum.update(f'{self._git_path}_{salt}'.encode("utf-8"))
+        hashsum.update(json.dumps(stats, default=Tools.json_serial).encode("utf-8"))
 
-        return sha1sum.hexdigest()
+        return hashsum.hexdigest()
 
     @classmethod
     def _diff_type(cls, diff):
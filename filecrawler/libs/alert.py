@@ -1,6 +1,8 @@
 from re import Pattern
 from typing import Iterator
 
+from filecrawler.libs.registry import Registry
+
 
 class Alert(object):
     _id = ''
@@ -29,5 +31,11 @@ class Alert(object):
     def __str__(self):
         return f'<{self._name} id {self._id}>'
 
+    def get_class(self) -> type:
+        # Imported on first use when listed from the manifest
+        if self._class is None:
+            self._class = Registry.load_class(self._alert, self._qualname)
+        return self._class
+
     def create_instance(self):
-        return self._class(self._config)
+        return self.get_class()(self._config)
@@ -0,0 +1,48 @@
+import hashlib
+import math
+import threading
+
+
+class BloomFilter(object):
+    '''
+    Compact set of ids without false negatives: a miss means the id was never added,
+    a hit means the id was probably added (false positive rate close to error_rate at the capacity)
+    '''
+    _size = 0
+    _hashes = 0
+    _bits = None
+    _count = 0
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(int(capacity), 1)
+        self._size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self._hashes = max(int(round(self._size / capacity * math.log(2))), 1)
+        self._bits = bytearray((self._size + 7) // 8)
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[i >> 3] & (1 << (i & 7)) for i in self._get_indexes(key))
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+    def add(self, key: str):
+        indexes = list(self._get_indexes(key))
+        with self._lock:
+            for i in indexes:
+                self._bits[i >> 3] |= 1 << (i & 7)
+            self._count += 1
+
+    def _get_indexes(self, key: str):
+        # Double hashing over the two halves of one digest
+        digest = hashlib.blake2b(str(key).encode('utf-8', 'ignore'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self._hashes):
+            yield (h1 + i * h2) % self._size
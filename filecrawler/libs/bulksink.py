@@ -0,0 +1,310 @@
+import threading
+import time
+from collections import deque
+
+
+class BulkSink(object):
+    '''
+    Buffers the index actions of the integrated files and sends them with the elasticsearch streaming bulk API
+    when the buffer reaches bulk_size actions or byte_size bytes, and every flush_interval seconds.
+    A file (key) is confirmed only when all of its actions were indexed, so the caller keeps it at the
+    retry backlog until on_done, on_failed receives the error of the first failed action of each file.
+
+    Flow control (AIMD): rejections (429), server errors and timeouts halve the batch size and the concurrent
+    bulk requests and back off the flushing threads; every GROW_AFTER clean flushes they grow again up to
+    bulk_size and concurrency. The callers only wait when the buffer holds concurrency + 1 batches,
+    slowing the crawl down to the cluster capacity.
+    Without flushing threads (flush_interval 0) the caller flushes a full buffer itself, without the backoff
+    '''
+    DEFAULT_BULK_SIZE = 200
+    DEFAULT_BYTE_SIZE = 500 * 1024
+    DEFAULT_FLUSH_INTERVAL = 2.0
+    DEFAULT_CONCURRENCY = 2
+    MIN_BULK_SIZE = 10
+    MAX_BACKOFF = 30.0
+    GROW_AFTER = 5
+    RATE_WINDOW = 10.0
+    DRAIN_TIMEOUT = 60.0
+
+    _client = None
+    _bulk_size = DEFAULT_BULK_SIZE
+    _byte_size = DEFAULT_BYTE_SIZE
+    _flush_interval = DEFAULT_FLUSH_INTERVAL
+    _on_done = None
+    _on_failed = None
+
+    def __init__(self, client, bulk_size: int = DEFAULT_BULK_SIZE, byte_size: int = DEFAULT_BYTE_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL, concurrency: int = DEFAULT_CONCURRENCY,
+                 on_done=None, on_failed=None):
+        '''
+        client: elasticsearch client
+        concurrency: maximum concurrent bulk requests
+        on_done: called with the list of keys whose actions were all indexed
+        on_failed: called with a dict of key: failed action info ({'status': ..., 'error': ...})
+        '''
+        self._client = client
+        self._bulk_size = max(int(bulk_size), 1)
+        self._byte_size = max(int(byte_size), 1)
+        self._flush_interval = float(flush_interval)
+        self._on_done = on_done
+        self._on_failed = on_failed
+
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._ready = threading.Event()
+        self._actions = []
+        self._keys = []
+        self._bytes = 0
+        self._pending = set()
+        self._stop = threading.Event()
+        self._threads = []
+
+        self._max_concurrency = max(int(concurrency), 1)
+        self._concurrency = self._max_concurrency
+        self._limit = self._bulk_size
+        self._in_flight = 0
+        self._slots = threading.Condition()
+        self._clean = 0
+        self._backoff = 0.0
+        self._resume_at = 0.0
+        self._history = deque()
+
+        # Actions kept at most at the buffer, before add waits for the flushing threads
+        self._max_actions = self._bulk_size * (self._max_concurrency + 1)
+        self._max_bytes = self._byte_size * (self._max_concurrency + 1)
+
+        if self._flush_interval > 0:
+            for _ in range(self._max_concurrency):
+                t = threading.Thread(target=self._flusher)
+                t.daemon = True
+                t.start()
+                self._threads.append(t)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def buffered(self) -> int:
+        return len(self._actions)
+
+    @property
+    def limit(self) -> int:
+        ''' Current batch size '''
+        return self._limit
+
+    @property
+    def concurrency(self) -> int:
+        ''' Current maximum of concurrent bulk requests '''
+        return self._concurrency
+
+    @property
+    def rate(self) -> float:
+        ''' Files confirmed per second over the last RATE_WINDOW seconds '''
+        now = time.time()
+        with self._lock:
+            while len(self._history) > 0 and self._history[0][0] < now - BulkSink.RATE_WINDOW:
+                self._history.popleft()
+            return sum(c for _, c in self._history) / BulkSink.RATE_WINDOW
+
+    def is_pending(self, key: str) -> bool:
+        return key in self._pending
+
+    def add(self, key: str, actions: list) -> bool:
+        '''
+        Buffer the actions of one file, waiting while the buffer is at its limit
+        (or flushing at the caller thread when there is no flushing thread).
+        Returns False when the file is still pending (buffered or being sent)
+        '''
+        with self._lock:
+            if key in self._pending:
+                return False
+
+            while len(self._threads) > 0 and not self._stop.is_set() and \
+                    (len(self._actions) >= self._max_actions or self._bytes >= self._max_bytes):
+                self._space.wait(0.3)
+
+            self._pending.add(key)
+            for a in actions:
+                self._actions.append(a)
+                self._keys.append(key)
+                self._bytes += BulkSink.get_size(a.get('_source', None))
+
+            full = len(self._actions) >= self._limit or self._bytes >= self._byte_size
+
+        if full and len(self._threads) > 0:
+            self._ready.set()
+        elif full:
+            self.flush()
+
+        return True
+
+    def flush(self, requeue: bool = False) -> int:
+        '''
+        Send the buffered actions.
+        requeue: keep the files failed by retryable errors at the buffer, instead of reporting them to on_failed.
+        Returns the number of files kept at the buffer
+        '''
+        from elasticsearch.helpers import streaming_bulk
+
+        if len(self._actions) == 0:
+            return 0
+
+        # Actions buffered while waiting for the slot go at the same request
+        self._acquire()
+        try:
+            with self._lock:
+                if len(self._actions) == 0:
+                    return 0
+                actions, keys = self._actions, self._keys
+                self._actions, self._keys, self._bytes = [], [], 0
+                self._ready.clear()
+                self._space.notify_all()
+
+            failed = {}
+            sent = 0
+            try:
+                # Results are yielded in the same order of the actions
+                for ok, item in streaming_bulk(self._client, actions,
+                                               chunk_size=self._limit,
+                                               max_chunk_bytes=self._byte_size,
+                                               raise_on_error=False,
+                                               raise_on_exception=False):
+                    if not ok and keys[sent] not in failed:
+                        failed[keys[sent]] = BulkSink.get_item_error(item)
+                    sent += 1
+            except Exception as e:
+                # Connection errors are raised instead of reported per action
+                for k in keys[sent:]:
+                    if k not in failed:
+                        failed[k] = dict(status=None, error=str(e))
+
+            self._adapt(any(BulkSink.is_retryable(f) for f in failed.values()))
+        finally:
+            self._release()
+
+        retry = set()
+        if requeue:
+            retry = {k for k, f in failed.items() if BulkSink.is_retryable(f)}
+            failed = {k: f for k, f in failed.items() if k not in retry}
+            with self._lock:
+                for k, a in zip(keys, actions):
+                    if k in retry:
+                        self._actions.append(a)
+                        self._keys.append(k)
+                        self._bytes += BulkSink.get_size(a.get('_source', None))
+
+        done = [k for k in dict.fromkeys(keys) if k not in failed and k not in retry]
+        if len(done) > 0:
+            with self._lock:
+                self._history.append((time.time(), len(done)))
+        try:
+            if len(done) > 0 and self._on_done is not None:
+                self._on_done(done)
+
+            if len(failed) > 0 and self._on_failed is not None:
+                self._on_failed(failed)
+        finally:
+            # Released after the callbacks, so the retry backlog does not send them again meanwhile
+            with self._lock:
+                self._pending.difference_update(k for k in keys if k not in retry)
+
+        return len(retry)
+
+    def _acquire(self):
+        with self._slots:
+            while self._in_flight >= self._concurrency:
+                self._slots.wait()
+            self._in_flight += 1
+
+    def _release(self):
+        with self._slots:
+            self._in_flight -= 1
+            self._slots.notify_all()
+
+    def _adapt(self, pressure: bool) -> float:
+        ''' Additive increase, multiplicative decrease of the batch size and concurrency, returns the backoff '''
+        with self._slots:
+            if pressure:
+                self._clean = 0
+                self._limit = max(min(BulkSink.MIN_BULK_SIZE, self._bulk_size), self._limit // 2)
+                self._concurrency = max(1, self._concurrency // 2)
+                self._backoff = min(max(self._backoff * 2, 0.5), BulkSink.MAX_BACKOFF)
+                self._resume_at = time.time() + self._backoff
+            else:
+                self._backoff = 0.0
+                self._clean += 1
+                if self._clean >= BulkSink.GROW_AFTER:
+                    self._clean = 0
+                    self._limit = min(self._bulk_size, self._limit + max(self._bulk_size // 10, 1))
+                    self._concurrency = min(self._max_concurrency, self._concurrency + 1)
+                    self._slots.notify_all()
+
+            return self._backoff
+
+    def close(self, timeout: float = None):
+        '''
+        Stop the flushing thread and drain the buffer, sending again the files failed by retryable errors
+        (after the backoff) up to timeout seconds (DRAIN_TIMEOUT by default). The files still failing are
+        reported to on_failed, so they stay at the retry backlog of the next crawl
+        '''
+        self._stop.set()
+        self._ready.set()
+        with self._space:
+            self._space.notify_all()
+        for t in self._threads:
+            t.join()
+        self._threads = []
+
+        deadline = time.time() + (timeout if timeout is not None else BulkSink.DRAIN_TIMEOUT)
+        while len(self._actions) > 0 and time.time() < deadline:
+            if self.flush(requeue=True) > 0:
+                time.sleep(max(0.0, min(self._backoff, deadline - time.time())))
+
+        self.flush()
+
+    def _flusher(self):
+        while not self._stop.is_set():
+            # Full buffer or flush interval
+            self._ready.wait(self._flush_interval)
+
+            # Nothing is sent until the backoff ends, the callers keep buffering up to the buffer limit
+            wait = self._resume_at - time.time()
+            if wait > 0:
+                self._stop.wait(wait)
+                continue
+
+            if self._stop.is_set():
+                break
+
+            try:
+                self.flush()
+            except Exception as e:
+                from filecrawler.util.tools import Tools
+                Tools.print_error(e)
+
+    @staticmethod
+    def is_retryable(info: dict) -> bool:
+        ''' Connection errors, rejections (429) and server errors may succeed at a later attempt '''
+        status = info.get('status', None)
+        return status is None or status == 429 or status >= 500
+
+    @staticmethod
+    def get_item_error(item: dict) -> dict:
+        op_info = next(iter(item.values()), {}) if isinstance(item, dict) else {}
+        return dict(status=op_info.get('status', None), error=op_info.get('error', ''))
+
+    @staticmethod
+    def get_size(data) -> int:
+        ''' Approximated serialized size, without serializing the document twice '''
+        if data is None:
+            return 0
+        if isinstance(data, (str, bytes)):
+            return len(data) + 2
+        if isinstance(data, dict):
+            return sum(len(str(k)) + 4 + BulkSink.get_size(v) for k, v in data.items()) + 2
+        if isinstance(data, (list, tuple)):
+            return sum(BulkSink.get_size(v) + 1 for v in data) + 2
+        return len(str(data))
@@ -0,0 +1,45 @@
+import threading
+from typing import Tuple
+
+
+class Checkpoint(object):
+    ''' Tracks the walker position: directories not listed yet and listed directories with files in process '''
+    root = ''
+    _pending = None
+    _partial = None
+    _restored = None
+    _lock = None
+
+    def __init__(self, root: str, pending: list = None, partial: list = None):
+        self.root = str(root)
+        self._lock = threading.Lock()
+        self._pending = set(pending if pending is not None else [])
+
+        self._partial = {}
+
+        # Partially processed directories restored from a checkpoint, listed again without recursion
+        self._restored = set(partial if partial is not None else [])
+
+    def listed(self, here: str, entries: list, dirs: list):
+        with self._lock:
+            self._pending.discard(here)
+            self._restored.discard(here)
+            self._pending.update(dirs)
+            if len(entries) > 0:
+                self._partial[here] = self._partial.get(here, 0) + len(entries)
+
+    def done(self, entry):
+        with self._lock:
+            count = self._partial.get(entry.folder, 0) - 1
+            if count <= 0:
+                self._partial.pop(entry.folder, None)
+            else:
+                self._partial[entry.folder] = count
+
+    def snapshot(self) -> Tuple[list, list]:
+        with self._lock:
+            return list(self._pending), list(self._restored.union(self._partial.keys()))
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
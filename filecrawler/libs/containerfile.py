@@ -3,7 +3,6 @@ import hashlib
 import os
 import re
 import tempfile
-import pimht
 import json
 from pathlib import Path
 from urllib.parse import urlparse
@@ -191,6 +190,7 @@ class ContainerFile(object):
                 pass
 
             try:
+                import pimht
                 mhtml = pimht.from_string(f_data)
 
                 for part in mhtml:
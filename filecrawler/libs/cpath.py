@@ -16,21 +16,29 @@ class CPath(object):
     _hash = None
     _path_real = None
     _path_virtual = None
+    _container_path = None
 
-    def __init__(self, base_path: [str, Path],  path: [str, Path], container_path: TCPath = None):
+    def __init__(self, base_path: [str, Path],  path: [str, Path], container_path: TCPath = None,
+                 resolved: bool = False):
         self._path = Path(str(path))
 
-        base_path = str(Path(base_path).resolve())
-        self._path_real = str(self._path.resolve())
+        # When resolved is set, base_path and path are already absolute and free of symlinks (e.g. from Walker)
+        if resolved:
+            base_path = str(base_path)
+            self._path_real = str(self._path)
+        else:
+            base_path = str(Path(base_path).resolve())
+            self._path_real = str(self._path.resolve())
         self._path_virtual = self._path_real.replace(base_path, '').strip('\\/ ')
 
+        self._container_path = container_path
         if container_path is not None:
             self._path_real = container_path.path_real + f'/{self._path_virtual}'
             self._path_virtual = container_path.path_virtual + f'/{self._path_virtual}'
 
         self._path_virtual = '/' + self._path_virtual.replace('\\\\', '/').replace('\\', '/').replace('//', '/').lstrip('\\/ ')
 
-        if not self._path.exists():
+        if not resolved and not self._path.exists():
             from filecrawler.config import Configuration
             Color.pl('\n{!} {R}Error:{O} Path not found{W}'
                      '\n            {W}Real path.....: {G}%s{W}'
@@ -48,6 +56,10 @@ class CPath(object):
     def path(self) -> Path:
         return self._path
 
+    @property
+    def container_path(self) -> Optional[TCPath]:
+        return self._container_path
+
     @property
     def path_real(self) -> str:
         return self._path_real
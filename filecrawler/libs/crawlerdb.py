@@ -10,10 +10,12 @@ class CrawlerDB(Database):
 
     _FILE_INDEX_COLUMNS = ['file_id', 'index_id', 'fingerprint', 'filename', 'file_size', 'extension', 'mime_type',
                            'created', 'last_accessed', 'last_modified', 'indexing_date', 'path_real', 'path_virtual',
-                           'data', 'integrated']
+                           'data', 'integrated', 'hash_algorithm', 'sample_fingerprint']
 
     _ALERT_COLUMNS = ['alert_id', 'index_id', 'file_fingerprint', 'fingerprint', 'data', 'sent']
 
+    _FILE_STAT_COLUMNS = ['index_id', 'path_real', 'device', 'inode', 'file_size', 'mtime', 'ctime']
+
     def __init__(self, auto_create=True, db_name=None):
 
         if db_name is None:
@@ -24,6 +26,10 @@ class CrawlerDB(Database):
             db_name=db_name
         )
 
+        if auto_create:
+            # Create the tables added after the first release at existing databases
+            self.upgrade_db()
+
     def has_data(self) -> bool:
         return self.select_count('file_index') > 0
 
@@ -63,7 +69,8 @@ class CrawlerDB(Database):
                                                                  'extension',
                                                                  'integrated',
                                                                  'data',
-                                                                 'index_id'
+                                                                 'index_id',
+                                                                 'hash_algorithm'
                                                              ],
                                                              **data)
 
@@ -98,6 +105,136 @@ class CrawlerDB(Database):
 
         return dt
 
+    def set_integrated(self, index_id: int, fingerprints: list):
+        ''' Remove the files from the integration retry backlog '''
+        conn = self.connect_to_db()
+        conn.executemany(
+            "UPDATE [file_index] SET integrated = 1, data = '' WHERE index_id = ? AND fingerprint = ?",
+            [(index_id, f) for f in fingerprints]
+        )
+        conn.commit()
+
+    def get_hash_algorithm(self, index_name: str) -> Optional[str]:
+        ''' Hash algorithm of the fingerprints already stored at the index '''
+        rows = self.select_raw(
+            sql=("SELECT f.hash_algorithm FROM [file_index] AS f "
+                 "INNER JOIN [index] AS i ON i.index_id = f.index_id "
+                 "WHERE i.name = ? LIMIT 1"),
+            args=[index_name.lower()]
+        )
+        if rows is None or len(rows) == 0:
+            return None
+
+        return rows[0]['hash_algorithm']
+
+    @staticmethod
+    def get_file_stat(file) -> dict:
+        st = file.stats
+        return dict(
+            path_real=file.path_real,
+            device=st.st_dev,
+            inode=st.st_ino,
+            file_size=st.st_size,
+            mtime=st.st_mtime_ns,
+            ctime=st.st_ctime_ns
+        )
+
+    def is_file_unchanged(self, index_id: int, file) -> bool:
+        dt = self.select_first('file_stat', index_id=index_id, path_real=file.path_real)
+        if dt is None:
+            return False
+
+        return all(
+            dt.get(k, None) == v
+            for k, v in CrawlerDB.get_file_stat(file).items()
+        )
+
+    def insert_or_update_file_stat(self, index_id: int, file):
+        from filecrawler.config import Configuration
+
+        if Configuration.disable_db:
+            return
+
+        self.insert_update_one_exclude('file_stat',
+                                       exclude_on_update=['index_id', 'path_real'],
+                                       index_id=index_id,
+                                       **CrawlerDB.get_file_stat(file))
+
+    def save_checkpoint(self, index_id: int, root: str, pending: list, partial: list):
+        conn = self.connect_to_db()
+        conn.execute("DELETE FROM [walker_checkpoint] WHERE index_id = ?", (index_id, ))
+        conn.executemany(
+            "INSERT OR IGNORE INTO [walker_checkpoint] (index_id, path, state) VALUES (?, ?, ?)",
+            [(index_id, root, 'R')] +
+            [(index_id, p, 'P') for p in pending] +
+            [(index_id, p, 'O') for p in partial]
+        )
+        conn.commit()
+
+    def get_checkpoint(self, index_id: int) -> Optional[dict]:
+        rows = self.select('walker_checkpoint', index_id=index_id)
+        root = next((r['path'] for r in rows if r['state'] == 'R'), None)
+        if root is None:
+            return None
+
+        return dict(
+            root=root,
+            pending=[r['path'] for r in rows if r['state'] == 'P'],
+            partial=[r['path'] for r in rows if r['state'] == 'O']
+        )
+
+    def delete_checkpoint(self, index_id: int):
+        self.delete('walker_checkpoint', index_id=index_id)
+
+    def upgrade_db(self):
+        conn = self.connect_to_db()
+        cursor = conn.cursor()
+
+        columns = [r[1] for r in cursor.execute("PRAGMA table_info([file_index])").fetchall()]
+        if 'hash_algorithm' not in columns:
+            # Indexes created before the pluggable hash used SHA1
+            cursor.execute("ALTER TABLE [file_index] ADD COLUMN hash_algorithm TEXT NOT NULL DEFAULT ('sha1')")
+            conn.commit()
+
+        if 'sample_fingerprint' not in columns:
+            cursor.execute("ALTER TABLE [file_index] ADD COLUMN sample_fingerprint TEXT NULL")
+            conn.commit()
+
+        cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_file_index_sample_fingerprint
+                    ON [file_index] (index_id, sample_fingerprint);
+                """)
+        conn.commit()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS [file_stat] (
+                index_id INTEGER NOT NULL,
+                path_real TEXT NOT NULL,
+                device INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                file_size INTEGER NOT NULL,
+                mtime INTEGER NOT NULL,
+                ctime INTEGER NOT NULL,
+                FOREIGN KEY(index_id) REFERENCES [index](index_id),
+                UNIQUE(index_id, path_real)
+            );
+        """)
+        conn.commit()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS [walker_checkpoint] (
+                index_id INTEGER NOT NULL,
+                path TEXT NOT NULL,
+                state TEXT NOT NULL,
+                FOREIGN KEY(index_id) REFERENCES [index](index_id),
+                UNIQUE(index_id, path, state)
+            );
+        """)
+        conn.commit()
+
+        # Must get the constraints
+        self.get_constraints()
+
     def create_db(self):
 
         conn = self.connect_to_db(check=False)
@@ -132,6 +269,8 @@ class CrawlerDB(Database):
                 path_virtual TEXT NOT NULL,
                 data TEXT NULL,
                 integrated INTEGER NOT NULL DEFAULT (0),
+                hash_algorithm TEXT NOT NULL DEFAULT ('sha1'),
+                sample_fingerprint TEXT NULL,
                 FOREIGN KEY(index_id) REFERENCES [index](index_id),
                 UNIQUE(index_id, fingerprint)
             );
@@ -209,7 +209,7 @@ class Database(object):
         (u_columns, u_values) = self.parse_args(kwargs)
 
         sql = f"UPDATE {table_name} SET "
-        sql += "[{}]".format(', '.join([f'{col} = ?' for col in u_columns]))
+        sql += ', '.join([f'{col} = ?' for col in u_columns])
         if len(f_columns) > 0:
             sql += " WHERE {}".format(f' {operator} '.join([f'{col} = ?' for col in f_columns]))
         conn.execute(sql, tuple(u_values + f_values, ))
@@ -0,0 +1,192 @@
+import os
+import re
+from pathlib import PurePath
+from typing import Optional
+
+
+class ExcludeMatcher(object):
+    '''
+    Exclude glob list compiled once, with the same semantics of Path(path.lower()).match(pattern):
+    the path is lowercased, the pattern keeps its case (case sensitive on posix, as Path.match)
+    '''
+    patterns = []
+
+    # Path.match ignores the pattern case only where the filesystem paths do (Windows)
+    _CASE_FOLD = os.path.normcase('A') == 'a'
+
+    # Fast paths for the most common pattern shapes
+    _names = {}  # */name
+    _parent_names = {}  # */name/*
+    _suffixes = {}  # */*.ext
+    _suffix_tuple = ()
+
+    # Remaining patterns, grouped by (number of parts, anchored)
+    _regexes = {}
+    _derived = {}
+
+    _MAGIC = re.compile(r'[*?\[]')
+    _SEP = '\x00'
+
+    def __init__(self, patterns: list = None):
+        self.patterns = []
+        self._names = {}
+        self._parent_names = {}
+        self._suffixes = {}
+        self._regexes = {}
+        self._derived = {}
+
+        groups = {}
+        for p in (patterns if patterns is not None else []):
+            p = ExcludeMatcher.normalize(p)
+            if p == '' or p in self.patterns:
+                continue
+
+            self.patterns.append(p)
+
+            pp = PurePath(p)
+            parts = list(pp.parts)
+            anchored = pp.anchor != ''
+            if len(parts) == 0:
+                continue
+
+            if not anchored and len(parts) == 2 and parts[0] == '*':
+                if not self._MAGIC.search(parts[1]):
+                    self._names.setdefault(parts[1], p)
+                    continue
+
+                if parts[1][0:2] == '*.' and not self._MAGIC.search(parts[1][1:]):
+                    self._suffixes.setdefault(parts[1][1:], p)
+                    continue
+
+            if not anchored and len(parts) == 3 and parts[0] == '*' and parts[2] == '*' and \
+                    not self._MAGIC.search(parts[1]):
+                self._parent_names.setdefault(parts[1], p)
+                continue
+
+            groups.setdefault((len(parts), anchored), []).append((p, parts))
+
+        self._suffix_tuple = tuple(self._suffixes.keys())
+
+        for key, items in groups.items():
+            index = {}
+            rx = []
+            for i, (p, parts) in enumerate(items):
+                index[f'p{i}'] = p
+                rx.append('(?P<p%s>%s)' % (i, self._SEP.join([ExcludeMatcher._translate(x) for x in parts])))
+
+            self._regexes[key] = (re.compile('|'.join(rx), re.DOTALL), index)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __str__(self):
+        return f'<ExcludeMatcher {len(self.patterns)} patterns>'
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        # Same as fnmatch.translate, but wildcards never match the part separator
+        i, n = 0, len(pattern)
+        res = ''
+        while i < n:
+            c = pattern[i]
+            i += 1
+            if c == '*':
+                if not res.endswith(']*'):
+                    res += '[^\x00]*'
+            elif c == '?':
+                res += '[^\x00]'
+            elif c == '[':
+                j = i
+                if j < n and pattern[j] == '!':
+                    j += 1
+                if j < n and pattern[j] == ']':
+                    j += 1
+                while j < n and pattern[j] != ']':
+                    j += 1
+                if j >= n:
+                    res += '\\['
+                else:
+                    stuff = pattern[i:j].replace('\\', '\\\\')
+                    i = j + 1
+                    if stuff[0] == '!':
+                        stuff = '^' + stuff[1:]
+                    elif stuff[0] in ('^', '['):
+                        stuff = '\\' + stuff
+                    res += '[%s]' % stuff
+            else:
+                res += re.escape(c)
+        return res
+
+    @staticmethod
+    def normalize(pattern: str) -> str:
+        pattern = str(pattern).strip()
+        return pattern.lower() if ExcludeMatcher._CASE_FOLD else pattern
+
+    @staticmethod
+    def split(path: str) -> list:
+        ''' Fast equivalent of PurePath(path).parts '''
+        if os.altsep:
+            path = path.replace(os.altsep, os.sep)
+
+        parts = path.split(os.sep)
+        root = None
+        if parts[0] == '' and len(parts) > 1:
+            root = os.sep
+        elif os.sep == '\\' and len(parts[0]) == 2 and parts[0][1] == ':':
+            root = parts[0] + (os.sep if len(parts) > 1 else '')
+
+        parts = [x for x in parts[(1 if root is not None else 0):] if x != '' and x != '.']
+        if root is not None:
+            parts.insert(0, root)
+
+        return parts
+
+    def without(self, patterns: list) -> 'ExcludeMatcher':
+        ''' Matcher without the given patterns (cached) '''
+        if patterns is None or len(patterns) == 0:
+            return self
+
+        key = frozenset(ExcludeMatcher.normalize(p) for p in patterns)
+        m = self._derived.get(key, None)
+        if m is None:
+            m = ExcludeMatcher([p for p in self.patterns if p not in key])
+            self._derived[key] = m
+
+        return m
+
+    def match(self, path: str) -> Optional[str]:
+        ''' Return the pattern excluding the path, or None '''
+        if len(self.patterns) == 0:
+            return None
+
+        parts = ExcludeMatcher.split(str(path).lower())
+        size = len(parts)
+        if size == 0:
+            return None
+
+        name = parts[-1]
+        if size >= 2:
+            p = self._names.get(name, None)
+            if p is not None:
+                return p
+
+            if name.endswith(self._suffix_tuple):
+                return next((p for s, p in self._suffixes.items() if name.endswith(s)), None)
+
+        if size >= 3:
+            p = self._parent_names.get(parts[-2], None)
+            if p is not None:
+                return p
+
+        for (n, anchored), (rx, index) in self._regexes.items():
+            if size < n or (anchored and size != n):
+                continue
+
+            m = rx.fullmatch(self._SEP.join(parts[-n:]))
+            if m is not None:
+                return index[m.lastgroup]
+
+        return None
+
+    def is_excluded(self, path: str) -> bool:
+        return self.match(path) is not None
@@ -1,10 +1,11 @@
 import datetime
-import hashlib
 import os
+import stat
 from pathlib import Path
 from typing import Optional
 
 from filecrawler.libs.cpath import CPath
+from filecrawler.libs.hasher import Hasher
 from filecrawler.parsers.intelxinfo import IntelXInfo
 from filecrawler.util.tools import Tools
 
@@ -20,31 +21,50 @@ class File(CPath):
     _credentials = []
     _info = None
     _overwrite_date = None
+    _data = None
+    _sample_fingerprint = None
+
+    # Files up to this size are read only once, the buffer is shared by hash, mime and parsers
+    max_buffer_size = 64 * 1024 * 1024
+
+    # Block size of the sample fingerprint (first, middle and last blocks)
+    sample_block_size = 2 ** 16
 
     def __init__(self,
                  base_path: [str, Path],
                  file_path: [str, Path],
                  container_path: CPath = None,
-                 info: str = None):
+                 info: str = None,
+                 stats: os.stat_result = None,
+                 resolved: bool = False):
         super().__init__(
             base_path=base_path,
             path=file_path,
-            container_path=container_path
+            container_path=container_path,
+            resolved=resolved
         )
         self._info = str(info) if info is not None else None
 
-        if not self._path.is_file():
+        if stats is None:
+            if not self._path.is_file():
+                raise FileNotFoundError(f'Path is not a file instance: {self._path}')
+        elif not stat.S_ISREG(stats.st_mode):
             raise FileNotFoundError(f'Path is not a file instance: {self._path}')
 
         if isinstance(info, IntelXInfo.FileInfo):
             self._overwrite_date = Tools.to_epoch(info.date)
             # Try to update file time from information received
-            try:
-                os.utime(str(file_path), (self._overwrite_date, self._overwrite_date))
-            except:
-                pass
+            # (only when needed, utime also changes the ctime used by incremental crawls)
+            if stats is None or stats.st_mtime != self._overwrite_date:
+                try:
+                    os.utime(str(file_path), (self._overwrite_date, self._overwrite_date))
+                except:
+                    pass
+
+                # Times were changed by utime, so the cached stats are outdated
+                stats = None
 
-        self._stats = self._path.stat()
+        self._stats = stats if stats is not None else self._path.stat()
         if self._overwrite_date is None:
             self._overwrite_date = self._stats.st_ctime
 
@@ -56,13 +76,34 @@ class File(CPath):
         if self._fingerprint is not None:
             return self._fingerprint
 
-        sha1sum = hashlib.sha1()
-        #sha1sum.update(f'{self.hash}_{self._path_virtual}'.encode("utf-8"))
-        sha1sum.update(f'{self.hash}_{self._path.name.lower()}'.encode("utf-8"))
-        self._fingerprint = sha1sum.hexdigest()
+        hashsum = Hasher.new()
+        #hashsum.update(f'{self.hash}_{self._path_virtual}'.encode("utf-8"))
+        hashsum.update(f'{self.hash}_{self._path.name.lower()}'.encode("utf-8"))
+        self._fingerprint = hashsum.hexdigest()
 
         return self._fingerprint
 
+    @property
+    def sample_fingerprint(self) -> Optional[str]:
+        ''' Cheap fingerprint of huge files (size plus first, middle and last blocks), None for smaller files '''
+        if self._path is None or self._stats.st_size <= File.max_buffer_size:
+            return None
+
+        if self._sample_fingerprint is not None:
+            return self._sample_fingerprint
+
+        size = self._stats.st_size
+        block_size = File.sample_block_size
+        hashsum = Hasher.new()
+        hashsum.update(f'{size}_{self._path.name.lower()}'.encode("utf-8"))
+        with open(self._path, 'rb') as source:
+            for offset in (0, (size - block_size) // 2, size - block_size):
+                source.seek(max(0, offset))
+                hashsum.update(source.read(block_size))
+        self._sample_fingerprint = hashsum.hexdigest()
+
+        return self._sample_fingerprint
+
     @property
     def stats(self) -> os.stat_result:
         return self._stats
@@ -79,13 +120,20 @@ class File(CPath):
         if self._hash is not None:
             return self._hash
 
-        sha1sum = hashlib.sha1()
+        if self._stats.st_size <= File.max_buffer_size:
+            self.load()
+            return self._hash
+
+        hashsum = Hasher.new()
         with open(self._path, 'rb') as source:
             block = source.read(2 ** 16)
+            if self._mime_type is None:
+                self._mime_type = Tools.get_mimes(block, extension=self.extension)
+
             while len(block) != 0:
-                sha1sum.update(block)
+                hashsum.update(block)
                 block = source.read(2 ** 16)
-        self._hash = sha1sum.hexdigest()
+        self._hash = hashsum.hexdigest()
 
         return self._hash
 
@@ -104,9 +152,41 @@ class File(CPath):
         if self._mime_type is not None:
             return self._mime_type
 
-        self._mime_type = Tools.get_mime(str(self._path))
+        # Header only, the mime is checked before the size and exclude checks
+        self._mime_type = Tools.get_mimes(self.read_bytes(2048), extension=self.extension)
         return self._mime_type
 
+    @property
+    def data(self) -> Optional[bytes]:
+        return self._data
+
+    def load(self) -> bytes:
+        ''' Read the file once, calculating the hash and the mime type from the same buffer '''
+        if self._data is not None:
+            return self._data
+
+        with open(self._path, 'rb') as source:
+            data = source.read()
+
+        self._hash = Hasher.new(data=data).hexdigest()
+        if self._mime_type is None:
+            self._mime_type = Tools.get_mimes(data[:2048], extension=self.extension)
+
+        self._data = data
+        return self._data
+
+    def read_bytes(self, size: int = -1) -> bytes:
+        ''' File content, from the loaded buffer when available (loaded when the whole content is read) '''
+        if self._data is None and self._stats.st_size <= File.max_buffer_size and \
+                (size < 0 or size >= self._stats.st_size):
+            self.load()
+
+        if self._data is not None:
+            return self._data if size < 0 else self._data[:size]
+
+        with open(self._path, 'rb') as f:
+            return f.read(size)
+
     @property
     def db_dict(self) -> dict:
         return dict(
@@ -124,6 +204,12 @@ class File(CPath):
             info=self._info if self._info is not None and isinstance(self._info, str) else "",
         )
 
+    def __getstate__(self):
+        # The buffer is not sent to the scan processes, reading the file again is cheaper than pickling it
+        state = self.__dict__.copy()
+        state['_data'] = None
+        return state
+
     def __str__(self):
         return str(self._path_real)
 
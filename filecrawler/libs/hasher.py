@@ -0,0 +1,46 @@
+import hashlib
+
+
+class Hasher(object):
+    ''' Hash backend used by the file and git fingerprints '''
+    DEFAULT = 'sha1'
+    ALGORITHMS = ['sha1', 'blake2b', 'xxh3']
+
+    @staticmethod
+    def is_available(name: str) -> bool:
+        name = str(name).lower().strip()
+        if name not in Hasher.ALGORITHMS:
+            return False
+
+        if name == 'xxh3':
+            try:
+                import xxhash
+                return hasattr(xxhash, 'xxh3_128')
+            except ImportError:
+                return False
+
+        return True
+
+    @staticmethod
+    def new(name: str = None, data: bytes = None):
+        ''' New hash object (update/hexdigest interface) for the algorithm, default to the configured one '''
+        if name is None:
+            from filecrawler.config import Configuration
+            name = Configuration.hash_algorithm
+
+        name = str(name).lower().strip()
+        if name == 'sha1':
+            h = hashlib.sha1()
+        elif name == 'blake2b':
+            # Same digest length as SHA1
+            h = hashlib.blake2b(digest_size=20)
+        elif name == 'xxh3':
+            import xxhash
+            h = xxhash.xxh3_128()
+        else:
+            raise Exception(f'Unsupported hash algorithm: {name}')
+
+        if data is not None:
+            h.update(data)
+
+        return h
@@ -0,0 +1,57 @@
+class KeywordMatcher(object):
+    '''
+    Multi-pattern search of the rule keywords over the lowercase text.
+    Uses a pyahocorasick automaton (single pass) when installed, otherwise one str.find scan per distinct keyword
+    '''
+    _owners = {}
+    _automaton = None
+
+    def __init__(self, keywords: dict):
+        '''
+        keywords: dict of owner id and its keyword list
+        '''
+        self._owners = {}
+        for owner, kws in keywords.items():
+            for k in (kws if kws is not None else []):
+                k = str(k).lower()
+                if k == '':
+                    continue
+                self._owners.setdefault(k, set()).add(owner)
+
+        self._automaton = None
+        if len(self._owners) == 0:
+            return
+
+        try:
+            import ahocorasick
+            self._automaton = ahocorasick.Automaton()
+            for k in self._owners.keys():
+                self._automaton.add_word(k, k)
+            self._automaton.make_automaton()
+        except ImportError:
+            self._automaton = None
+
+    def __len__(self):
+        return len(self._owners)
+
+    def iter(self, l_text: str):
+        ''' Yield (start, keyword) of every keyword occurrence '''
+        if self._automaton is not None:
+            for end, k in self._automaton.iter(l_text):
+                yield end - len(k) + 1, k
+
+        else:
+            for k in self._owners.keys():
+                start = l_text.find(k)
+                while start != -1:
+                    yield start, k
+                    start = l_text.find(k, start + 1)
+
+    def search(self, l_text: str) -> dict:
+        ''' Candidate owners with the (start, end) position list of the keywords found '''
+        found = {}
+        for start, k in self.iter(l_text):
+            for owner in self._owners[k]:
+                found.setdefault(owner, []).append((start, start + len(k)))
+
+        return found
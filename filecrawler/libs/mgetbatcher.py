@@ -0,0 +1,62 @@
+import threading
+from concurrent.futures import Future
+
+
+class MGetBatcher(object):
+    '''
+    Groups the existence checks of concurrent threads into elasticsearch mget calls.
+    The first thread of a batch waits up to max_wait seconds (or until batch_size ids) for the others,
+    sends the mget and wakes every waiting thread with its own answer
+    '''
+    DEFAULT_BATCH_SIZE = 500
+    DEFAULT_MAX_WAIT = 0.05
+
+    _client = None
+    _index = ''
+    _batch_size = DEFAULT_BATCH_SIZE
+    _max_wait = DEFAULT_MAX_WAIT
+
+    def __init__(self, client, index: str, batch_size: int = DEFAULT_BATCH_SIZE, max_wait: float = DEFAULT_MAX_WAIT):
+        self._client = client
+        self._index = index
+        self._batch_size = max(int(batch_size), 1)
+        self._max_wait = max_wait
+        self._lock = threading.Lock()
+        self._full = threading.Event()
+        self._batch = []
+        self.requests = 0
+
+    def exists(self, id: str) -> bool:
+        ''' Raises the mget error (e.g. connection error) at every thread of the batch '''
+        future = Future()
+        with self._lock:
+            self._batch.append((id, future))
+            leader = len(self._batch) == 1
+            if len(self._batch) >= self._batch_size:
+                self._full.set()
+
+        if leader:
+            self._full.wait(self._max_wait)
+            with self._lock:
+                batch, self._batch = self._batch, []
+                self._full.clear()
+            self._send(batch)
+
+        return future.result()
+
+    def _send(self, batch: list):
+        try:
+            self.requests += 1
+            ids = list(dict.fromkeys(id for id, _ in batch))
+            res = self._client.mget(index=self._index, ids=ids, _source=False)
+            found = {
+                d.get('_id', None)
+                for d in res.get('docs', [])
+                if d.get('found', False) is True
+            }
+            for id, future in batch:
+                future.set_result(id in found)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
@@ -1,4 +1,7 @@
 
+from filecrawler.libs.registry import Registry
+
+
 class Module(object):
     name = ''
     description = ''
@@ -6,7 +9,7 @@ class Module(object):
     qualname = ''
     _class = ''
 
-    def __init__(self, name, description, module, qualname, class_name):
+    def __init__(self, name, description, module, qualname, class_name=None):
         self.name = name
         self.description = description
         self.module = module
@@ -14,7 +17,13 @@ class Module(object):
         self._class = class_name
         pass
 
+    def get_class(self) -> type:
+        # Imported on first use when listed from the manifest
+        if self._class is None:
+            self._class = Registry.load_class(self.module, self.qualname)
+        return self._class
+
     def create_instance(self):
-        return self._class()
+        return self.get_class()()
 
 
@@ -1,3 +1,5 @@
+from filecrawler.libs.registry import Registry
+
 
 class Parser(object):
     name = ''
@@ -5,6 +7,7 @@ class Parser(object):
     parser = ''
     qualname = ''
     _class = ''
+    _instance = None
     extensions = []
     mime_types = []
 
@@ -20,8 +23,20 @@ class Parser(object):
     def __str__(self):
         return self.name
 
+    def get_class(self) -> type:
+        # Imported on first use when listed from the manifest
+        if self._class is None:
+            self._class = Registry.load_class(self.parser, self.qualname)
+        return self._class
+
     def create_instance(self):
-        return self._class()
+        return self.get_class()()
+
+    def get_instance(self):
+        ''' Instance shared by all files, parsers keep no state between files '''
+        if self._instance is None:
+            self._instance = self.create_instance()
+        return self._instance
 
     def is_valid(self, extension: str, mime: str = None, mime_only: bool = False):
 
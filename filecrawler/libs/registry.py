@@ -0,0 +1,34 @@
+import importlib
+import pkgutil
+from pathlib import Path
+
+
+class Registry(object):
+    '''
+    Static manifest of a plugin package (command modules, parsers and alerters), declared at the package __init__.
+    Plugin modules are imported only when used, modules missing at the manifest are still discovered by import
+    '''
+
+    @staticmethod
+    def load_class(module: str, qualname: str) -> type:
+        obj = importlib.import_module(module)
+        for name in qualname.split('.'):
+            obj = getattr(obj, name)
+
+        return obj
+
+    @staticmethod
+    def get_undeclared(package_path: [str, Path], manifest: list) -> list:
+        ''' Module names at the package folder (found without importing them) not declared at the manifest '''
+        declared = set(m['module'] for m in manifest)
+        return [
+            modname for _, modname, ispkg in pkgutil.iter_modules([str(package_path)])
+            if not ispkg and modname not in declared
+        ]
+
+    @staticmethod
+    def is_declared(iclass: type, base_module: str, manifest: list) -> bool:
+        return any(
+            iclass.__module__ == f'{base_module}.{m["module"]}' and iclass.__qualname__ == m['qualname']
+            for m in manifest
+        )
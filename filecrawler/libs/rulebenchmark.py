@@ -0,0 +1,184 @@
+import multiprocessing
+import random
+import string
+import time
+from typing import Iterator, Tuple
+
+
+class RuleBenchmark(object):
+    '''
+    Runs every rule against adversarial inputs (long runs of identifier chars, near-miss tokens and
+    megabyte lines) and a synthetic realistic corpus, measuring the throughput and the worst-case time per rule
+    '''
+    DEFAULT_BUDGET = 1.0  # Worst-case seconds allowed to scan one input
+    DEFAULT_SIZE = 1024 * 1024
+    GRACE_TIME = 0.5  # Extra wait for the child process report before killing it
+    INPUT_TIMEOUT = 60  # Maximum time to create the rule instance or to generate one input
+
+    _rules = {}
+    _budget = DEFAULT_BUDGET
+    _size = DEFAULT_SIZE
+
+    def __init__(self, rules: dict, budget: float = DEFAULT_BUDGET, size: int = DEFAULT_SIZE):
+        '''
+        rules: dict of Rule, as returned by RuleBase.list_rules
+        budget: maximum time, in seconds, to scan each input
+        size: size of the long inputs (megabyte lines by default)
+        '''
+        self._rules = rules
+        self._budget = budget
+        self._size = size
+
+    def get_inputs(self, inst) -> Iterator[Tuple[str, str]]:
+        ''' Yield (input name, text) of the generated inputs of the rule instance '''
+        size = self._size
+        rnd = random.Random(inst.id)
+        ident = string.ascii_letters + string.digits + '_-'
+
+        yield 'identifier run', 'a' * size
+        yield 'random identifier run', ''.join(rnd.choice(ident) for _ in range(size))
+        yield 'separator run', ':=" ' * (size // 4)
+
+        for k in inst.keywords:
+            k = str(k)
+            yield f'keyword [{k}] + identifier run', k + 'a' * size
+            yield f'keyword [{k}] repeated', (k * (size // max(len(k), 1)))[:size]
+            yield f'keyword [{k}] + separators', ((k + ':a@b.') * (size // (len(k) + 5)))[:size]
+            yield f'keyword [{k}] + quoted run', k + ' = "' + 'A1' * (size // 2)
+
+        for i, tp in enumerate(inst._tps):
+            if len(tp) < 2:
+                continue
+
+            # Near-miss: the true positive without its last char, glued to itself up to the size
+            near = tp[:-1]
+            yield f'near-miss {i} repeated', (near * (size // len(near) + 1))[:size]
+
+            # Megabyte line: the true positive with its secret chars stretched over the whole line
+            yield f'stretched tp {i}', tp[:-1] + tp[-2:-1] * size + tp[-1:]
+
+        yield 'realistic corpus', self.get_corpus(inst, size)
+
+    @staticmethod
+    def get_corpus(inst, size: int) -> str:
+        ''' Synthetic source/config text with the rule true positives spread over it '''
+        rnd = random.Random(size)
+        words = ['password', 'user', 'token', 'host', 'http://', 'https://', 'import', 'return', 'def', 'key',
+                 'secret', 'config', 'value', '=', ':', '{', '}', '"', "'", 'localhost', '@', 'null', 'true']
+        lines = []
+        total = 0
+        tps = list(inst._tps)
+        while total < size:
+            if len(tps) > 0 and rnd.random() < 0.02:
+                line = rnd.choice(tps)
+            else:
+                line = ' '.join(rnd.choice(words) for _ in range(rnd.randint(3, 12)))
+            lines.append(line)
+            total += len(line) + 1
+
+        return '\n'.join(lines)
+
+    def run(self, callback=None) -> list:
+        '''
+        Benchmark all rules, returning one result per rule (slowest first).
+        Each rule runs at a child process killed as soon as one input exceeds the budget,
+        so a catastrophic backtracking is reported instead of hanging the benchmark.
+        callback: called with each result as soon as the rule finishes
+        '''
+        results = []
+        for rule_id, rule in self._rules.items():
+            result = self._run_rule(rule_id, rule)
+            results.append(result)
+
+            if callback is not None:
+                callback(result)
+
+        return sorted(results, key=lambda x: x['worst_time'], reverse=True)
+
+    def _run_rule(self, rule_id: str, rule) -> dict:
+        # Pipe writes are synchronous, a Queue would wait for its feeder thread, blocked by the running regex
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        proc = multiprocessing.Process(target=self._worker, args=(rule, writer), daemon=True)
+        proc.start()
+        writer.close()
+
+        total = 0.0
+        length = 0
+        worst = ('', 0.0)
+        inputs = 0
+        status = 'ok'
+        try:
+            while True:
+                # Inputs are generated before the 'start' message, it is not part of the budget
+                if not reader.poll(RuleBenchmark.INPUT_TIMEOUT):
+                    status = 'error'
+                    break
+
+                try:
+                    msg = reader.recv()
+                except EOFError:
+                    status = 'error'
+                    break
+
+                if msg is None:
+                    break
+
+                if msg[0] == 'error':
+                    status = 'error'
+                    worst = (msg[1], worst[1])
+                    break
+
+                name = msg[1]
+                started = time.perf_counter()
+                if not reader.poll(self._budget + RuleBenchmark.GRACE_TIME):
+                    worst = (name, time.perf_counter() - started)
+                    status = 'timeout'
+                    inputs += 1
+                    break
+
+                _, _, elapsed, size = reader.recv()
+
+                inputs += 1
+                total += elapsed
+                length += size
+                if elapsed > worst[1]:
+                    worst = (name, elapsed)
+
+        finally:
+            if proc.is_alive():
+                proc.terminate()
+            proc.join()
+            reader.close()
+
+        if status == 'ok' and worst[1] > self._budget:
+            status = 'over budget'
+
+        return dict(
+            rule=rule_id,
+            inputs=inputs,
+            size_mb=round(length / 1024 / 1024, 2),
+            time=round(total, 3),
+            throughput_mb_s=round(length / 1024 / 1024 / total, 2) if total > 0 else 0.0,
+            worst_input=worst[0],
+            worst_time=round(worst[1], 3),
+            status=status,
+        )
+
+    def _worker(self, rule, conn):
+        name = ''
+        try:
+            inst = rule.create_instance()
+            inst.compile()
+
+            for name, text in self.get_inputs(inst):
+                conn.send(('start', name))
+                start = time.perf_counter()
+                inst.run(text)
+                conn.send(('done', name, time.perf_counter() - start, len(text)))
+
+            conn.send(None)
+        except Exception as e:
+            conn.send(('error', f'{name}: {e}'))
+
+    def get_failures(self, results: list) -> list:
+        return [r for r in results if r['status'] != 'ok']
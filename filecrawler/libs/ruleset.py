@@ -0,0 +1,159 @@
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+
+from filecrawler._exceptions import ScanTimeoutError
+from filecrawler.libs.keywordmatcher import KeywordMatcher
+from filecrawler.libs.rulestats import RuleStats
+from filecrawler.libs.scanbudget import ScanBudget
+
+
+class RuleSet(object):
+    ''' Rule instances created once and shared (read only) by all worker threads '''
+    _rules = []
+    _matcher = None
+    _windowed = True
+    _overlap = 0
+
+    # Overlap between chunks of the streaming scan, when a rule has no maximum match length
+    DEFAULT_OVERLAP = 4096
+
+    def __init__(self, rules: dict, windowed: bool = True):
+        self._windowed = windowed
+        self._rules = []
+        for k, rule in rules.items():
+            inst = rule.create_instance()
+            inst.compile()
+            self._rules.append(inst)
+
+        # Keywords of all rules searched at once, only the candidate rules run their regex
+        self._matcher = KeywordMatcher({inst.id: inst.keywords for inst in self._rules})
+
+        self._overlap = 0
+        for inst in self._rules:
+            try:
+                size = inst.max_length(inst.regex) if inst.regex is not None else 0
+            except Exception:
+                size = RuleSet.DEFAULT_OVERLAP
+            self._overlap = max(self._overlap, size, inst.max_match_length)
+
+    @property
+    def overlap(self) -> int:
+        return self._overlap
+
+    def __len__(self):
+        return len(self._rules)
+
+    def __iter__(self):
+        return iter(self._rules)
+
+    def detect(self, text: str, budget: ScanBudget = None, positions: dict = None) -> Optional[dict]:
+        '''
+        budget: scanning time allowed to the file, rules exceeding it are stopped (and recorded at the budget)
+        positions: receives the start offsets of the matches of each rule (rule id: {match: [start, ...]})
+        '''
+        start = time.perf_counter()
+        l_text = text.lower()
+        candidates = self._matcher.search(l_text)
+
+        row = RuleStats.get_row(RuleStats.PREFILTER)
+        row['time'] += time.perf_counter() - start
+        row['texts'] += 1
+        row['keyword_pass'] += 1 if len(candidates) > 0 else 0
+
+        findings = {}
+        for inst in self._rules:
+            row = RuleStats.get_row(inst.id)
+            row['texts'] += 1
+
+            matches = candidates.get(inst.id, None)
+            if matches is None:
+                continue
+
+            deadline = None
+            if budget is not None:
+                if budget.is_stopped(inst.id):
+                    continue
+                deadline = budget.get_deadline(inst.id)
+
+            row['keyword_pass'] += 1
+            start = time.perf_counter()
+            try:
+                ret = inst.run(text, l_text=l_text, matches=matches, windowed=self._windowed, stats=row,
+                               deadline=deadline,
+                               positions=positions.setdefault(inst.id, {}) if positions is not None else None)
+            except ScanTimeoutError:
+                budget.truncate(inst.id)
+                ret = None
+
+            elapsed = time.perf_counter() - start
+            row['time'] += elapsed
+            if budget is not None:
+                budget.add_time(inst.id, elapsed)
+
+            if ret is not None and len(ret) > 0:
+                row['findings'] += len(ret)
+                findings.update({inst.id: dict(name=str(inst), findings=ret)})
+
+        if len(findings) == 0:
+            return None
+
+        return dict(credentials=findings)
+
+    def scan(self, chunks: Iterable[str], overlap: int = None,
+             budget: ScanBudget = None) -> Iterator[Tuple[object, dict]]:
+        '''
+        Streaming detection over text chunks, keeping only the current chunk and the overlap in memory.
+        Yields (rule, finding) for every occurrence as soon as each chunk is scanned,
+        the finding has the absolute 'offset' of the match
+        '''
+        if overlap is None:
+            overlap = self._overlap
+
+        reported = set()  # Absolute (rule id, start, end) of the reported matches reaching the overlap
+        tail = ''
+        base = 0  # Absolute offset of the buffer start
+        chunks = iter(c for c in chunks if c is not None and len(c) > 0)
+        chunk = next(chunks, None)
+        while chunk is not None:
+            # Remaining chunks are not scanned
+            if budget is not None and budget.file_exceeded():
+                break
+
+            buffer = tail + chunk
+            chunk = next(chunks, None)
+
+            # Matches starting at the overlap of a non-final buffer may be cut by the chunk boundary
+            # (the rules also match at the end of the text), they are reported with the next buffer
+            limit = len(buffer) - overlap if chunk is not None else len(buffer)
+            tail = buffer[-overlap:] if chunk is not None and overlap > 0 else ''
+
+            positions = {}
+            ret = self.detect(buffer, budget=budget, positions=positions)
+            found = set()
+            if ret is not None:
+                for inst in self._rules:
+                    data = ret['credentials'].get(inst.id, None)
+                    if data is None:
+                        continue
+
+                    for f in data['findings']:
+                        starts = positions.get(inst.id, {}).get(f['match'], None)
+                        if starts is None:
+                            starts = [max(0, buffer.find(f['match']))]
+
+                        for start in sorted(set(starts)):
+                            if start >= limit:
+                                continue
+
+                            # Suffixes of the matches already reported with the previous buffer
+                            s, e = base + start, base + start + len(f['match'])
+                            if any(i == inst.id and s < r_end and r_start < e for (i, r_start, r_end) in reported):
+                                continue
+
+                            if start + len(f['match']) > len(buffer) - len(tail):
+                                found.add((inst.id, s, e))
+
+                            yield inst, dict(f, offset=s)
+
+            reported = found
+            base += len(buffer) - len(tail)
@@ -0,0 +1,103 @@
+import json
+import threading
+from pathlib import Path
+from typing import Optional
+
+
+class RuleStats(object):
+    ''' Per rule profiling counters, kept per thread (no locking at the hot path) and merged at the report '''
+    FIELDS = ['time', 'texts', 'keyword_pass', 'matches', 'fp_drops', 'findings']
+
+    # Row of the keyword prefilter shared by all rules (lowercase and keyword search)
+    PREFILTER = '<keyword prefilter>'
+
+    _local = threading.local()
+    _tables = []
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_row(rule_id: str) -> dict:
+        table = getattr(RuleStats._local, 'table', None)
+        if table is None:
+            table = {}
+            RuleStats._local.table = table
+            with RuleStats._lock:
+                RuleStats._tables.append(table)
+
+        row = table.get(rule_id, None)
+        if row is None:
+            row = {k: 0 for k in RuleStats.FIELDS}
+            table[rule_id] = row
+
+        return row
+
+    @staticmethod
+    def clear():
+        with RuleStats._lock:
+            for table in RuleStats._tables:
+                table.clear()
+
+    @staticmethod
+    def pop() -> dict:
+        ''' Raw counters of all threads, cleared after the read (sent by the scan processes to the parent) '''
+        merged = {}
+        with RuleStats._lock:
+            for table in RuleStats._tables:
+                for rule_id, row in table.items():
+                    m = merged.setdefault(rule_id, {k: 0 for k in RuleStats.FIELDS})
+                    for k in RuleStats.FIELDS:
+                        m[k] += row[k]
+                table.clear()
+
+        return merged
+
+    @staticmethod
+    def add(counters: dict):
+        ''' Sum raw counters (as returned by pop) to the current thread table '''
+        for rule_id, row in counters.items():
+            r = RuleStats.get_row(rule_id)
+            for k in RuleStats.FIELDS:
+                r[k] += row.get(k, 0)
+
+    @staticmethod
+    def get_stats() -> list:
+        ''' Merged counters of all threads, slowest rules first '''
+        merged = {}
+        with RuleStats._lock:
+            tables = [dict(t) for t in RuleStats._tables]
+
+        for table in tables:
+            for rule_id, row in table.items():
+                m = merged.setdefault(rule_id, {k: 0 for k in RuleStats.FIELDS})
+                for k in RuleStats.FIELDS:
+                    m[k] += row[k]
+
+        stats = []
+        for rule_id, m in merged.items():
+            stats.append(dict(
+                rule=rule_id,
+                time=round(m['time'], 3),
+                texts=m['texts'],
+                keyword_pass=m['keyword_pass'],
+                keyword_pass_rate=round(m['keyword_pass'] / m['texts'] * 100.0, 2) if m['texts'] > 0 else 0.0,
+                avg_time_ms=round(m['time'] / m['keyword_pass'] * 1000.0, 3) if m['keyword_pass'] > 0 else 0.0,
+                matches=m['matches'],
+                fp_drops=m['fp_drops'],
+                findings=m['findings'],
+            ))
+
+        return sorted(stats, key=lambda x: x['time'], reverse=True)
+
+    @staticmethod
+    def save(path: [str, Path], stats: list = None) -> Optional[Path]:
+        if stats is None:
+            stats = RuleStats.get_stats()
+
+        if len(stats) == 0:
+            return None
+
+        file_name = Path(path).resolve()
+        with open(file_name, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
+
+        return file_name
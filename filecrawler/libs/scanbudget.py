@@ -0,0 +1,71 @@
+import time
+from typing import Optional
+
+
+class ScanBudget(object):
+    '''
+    Rule scanning time allowed to one file, in total and per rule (0 = unlimited).
+    Checked by the rule engine between regex matches, windows, rules and chunks
+    '''
+    _file_timeout = 0
+    _rule_timeout = 0
+    _start = 0
+    _end = None
+    _rule_time = {}
+
+    def __init__(self, file_timeout: float = 0, rule_timeout: float = 0):
+        self._file_timeout = file_timeout if file_timeout is not None and file_timeout > 0 else 0
+        self._rule_timeout = rule_timeout if rule_timeout is not None and rule_timeout > 0 else 0
+        self._start = time.perf_counter()
+        self._rule_time = {}
+        self.file_truncated = False
+        self.truncated_rules = set()
+
+    @property
+    def truncated(self) -> bool:
+        return self.file_truncated or len(self.truncated_rules) > 0
+
+    @property
+    def elapsed(self) -> float:
+        return (self._end if self._end is not None else time.perf_counter()) - self._start
+
+    def finish(self):
+        ''' Stop the clock, keeping the elapsed time when the budget is sent back by a scan process '''
+        self._end = time.perf_counter()
+
+    def file_exceeded(self) -> bool:
+        if self._file_timeout > 0 and self.elapsed >= self._file_timeout:
+            self.file_truncated = True
+
+        return self.file_truncated
+
+    def is_stopped(self, rule_id: str) -> bool:
+        ''' Whether the rule must not scan anything else of this file '''
+        if self.file_exceeded():
+            return True
+
+        if self._rule_timeout > 0 and self._rule_time.get(rule_id, 0) >= self._rule_timeout:
+            self.truncated_rules.add(rule_id)
+
+        return rule_id in self.truncated_rules
+
+    def get_deadline(self, rule_id: str) -> Optional[float]:
+        ''' time.perf_counter() value where the current run of the rule must stop '''
+        now = time.perf_counter()
+        deadline = None
+
+        if self._file_timeout > 0:
+            deadline = self._start + self._file_timeout
+
+        if self._rule_timeout > 0:
+            rule_deadline = now + self._rule_timeout - self._rule_time.get(rule_id, 0)
+            deadline = rule_deadline if deadline is None else min(deadline, rule_deadline)
+
+        return deadline
+
+    def add_time(self, rule_id: str, elapsed: float):
+        self._rule_time[rule_id] = self._rule_time.get(rule_id, 0) + elapsed
+
+    def truncate(self, rule_id: str):
+        self.truncated_rules.add(rule_id)
+        self.file_exceeded()
@@ -0,0 +1,95 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from filecrawler.libs.logger import Logger
+from filecrawler.libs.rulestats import RuleStats
+
+# Configuration values sent to the scan processes
+_STATE_TYPES = (str, int, float, bool, list, tuple, dict, Path, type(None))
+
+
+def _init_process(state: dict):
+    from filecrawler.config import Configuration
+    from filecrawler.parserbase import ParserBase
+    from filecrawler.rulebase import RuleBase
+
+    for k, v in state.items():
+        setattr(Configuration, k, v)
+
+    # Loaded once per process, not per file
+    ParserBase.list_parsers()
+    if not Configuration.disable_rules:
+        RuleBase.get_ruleset()
+
+
+def _run(func, args: tuple):
+    result = func(*args)
+    return result, RuleStats.pop()
+
+
+class ScanPool(object):
+    '''
+    Process pool running the CPU bound parse and rule detection out of the GIL of the crawler threads.
+    The crawler threads wait for the result, walker, database and integrators stay at the parent process
+    '''
+    _processes = 0
+    _executor = None
+    _lock = None
+
+    def __init__(self, processes: int):
+        self._processes = processes
+        self._lock = threading.Lock()
+        self._executor = self._create()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def processes(self) -> int:
+        return self._processes
+
+    @staticmethod
+    def get_state() -> dict:
+        from filecrawler.config import Configuration
+
+        return {
+            k: v for k, v in vars(Configuration).items()
+            if not k.startswith('_') and isinstance(v, _STATE_TYPES)
+        }
+
+    def _create(self) -> ProcessPoolExecutor:
+        # Spawned (not forked) processes, the parent already has running threads holding locks
+        return ProcessPoolExecutor(
+            max_workers=self._processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_process,
+            initargs=(ScanPool.get_state(),)
+        )
+
+    def run(self, func, *args):
+        ''' Execute func(*args) at a scan process, waiting for the result '''
+        executor = self._executor
+        try:
+            result, stats = executor.submit(_run, func, args).result()
+        except BrokenProcessPool:
+            with self._lock:
+                if self._executor is executor:
+                    Logger.pl('{!} {O}Warning:{W} a scan process died, restarting the process pool')
+                    executor.shutdown(wait=False)
+                    self._executor = self._create()
+            raise
+
+        RuleStats.add(stats)
+        return result
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
@@ -1,6 +1,5 @@
 import re
 from pathlib import Path
-from ansi2image.ansi2image import Ansi2Image
 
 from filecrawler.config import Configuration
 from filecrawler.libs.color import Color
@@ -231,6 +230,8 @@ class Slice(object):
         return pattern.sub('', text)
 
     def save_png(self, filename):
+        from ansi2image.ansi2image import Ansi2Image
+
         o = Ansi2Image(0, 0, font_name=Ansi2Image.get_default_font_name(), font_size=13)
         if len(self._table.split('\n')) > 200:
             text = '\n'.join(self._table.split('\n')[0:200])
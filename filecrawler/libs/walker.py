@@ -0,0 +1,323 @@
+import os
+import queue
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Iterator, Optional, Tuple
+
+from filecrawler.libs.checkpoint import Checkpoint
+from filecrawler.libs.cpath import CPath
+from filecrawler.libs.excludematcher import ExcludeMatcher
+from filecrawler.parsers.intelxinfo import IntelXInfo
+
+
+class Walker(object):
+    ''' Single pass directory walker built on os.scandir '''
+    _INFO_FILES = ('Info.csv', 'info.csv')
+
+    class Entry(object):
+        __slots__ = ('base_path', 'path', 'folder', 'container_path', 'info', 'dir_entry', 'is_git')
+
+        def __init__(self, base_path: str, path: str, folder: str, container_path: CPath = None, info: Any = None,
+                     dir_entry: os.DirEntry = None, is_git: bool = False):
+            self.base_path = base_path
+            self.path = path
+            self.folder = folder
+            self.container_path = container_path
+            self.info = info
+            self.dir_entry = dir_entry
+            self.is_git = is_git
+
+        def __str__(self):
+            return self.path
+
+        def create_instance(self) -> CPath:
+            from filecrawler.libs.file import File
+
+            if self.is_git:
+                return CPath(self.base_path, self.path, self.container_path, resolved=True)
+
+            stats = None
+            if self.dir_entry is not None:
+                # Cached by DirEntry on Windows, a single stat call otherwise
+                stats = self.dir_entry.stat()
+
+            return File(self.base_path, self.path, self.container_path, info=self.info, stats=stats, resolved=True)
+
+    base_path = ''
+    exclude_matcher = None
+    git_support = True
+    follow_symlinks = True
+    container_path = None
+    on_error = None
+    checkpoint = None
+
+    def __init__(self, base_path: [str, Path], excludes: [list, ExcludeMatcher] = None, git_support: bool = True,
+                 follow_symlinks: bool = True, container_path: CPath = None, on_error: Any = None,
+                 checkpoint: Checkpoint = None):
+        if on_error is not None and not callable(on_error):
+            raise Exception('on_error is not callable')
+
+        self.base_path = os.path.realpath(str(base_path))
+        self.exclude_matcher = excludes if isinstance(excludes, ExcludeMatcher) else ExcludeMatcher(excludes)
+        self.git_support = git_support
+        self.follow_symlinks = follow_symlinks
+        self.container_path = container_path
+        self.on_error = on_error
+        self.checkpoint = checkpoint
+
+    def walk(self, path: [str, Path] = None, recursive: bool = True,
+             pending: list = None, partial: list = None) -> Iterator[Entry]:
+        '''
+        Walk the path, or resume a walk from the pending directories and the
+        partially processed directories (listed again without recursion) of a checkpoint
+        '''
+        if path is None:
+            path = self.base_path
+
+        if pending is None:
+            pending = [os.path.realpath(str(path))]
+
+        yield from self.scan_partial(partial)
+
+        # Explicit stack instead of recursive generators, keeping the same (pre-order) ordering
+        stack = list(pending)
+        while len(stack) > 0:
+            here = stack.pop()
+            (entries, dirs) = self.scan(here)
+            if not recursive:
+                dirs = []
+
+            if self.checkpoint is not None:
+                self.checkpoint.listed(here, entries, dirs)
+
+            yield from entries
+            stack.extend(reversed(dirs))
+
+    def scan_partial(self, partial: list = None) -> Iterator[Entry]:
+        for here in (partial if partial is not None else []):
+            (entries, _) = self.scan(here)
+            if self.checkpoint is not None:
+                self.checkpoint.listed(here, entries, [])
+
+            yield from entries
+
+    def scan(self, here: str) -> Tuple[list, list]:
+        ''' List one directory, returning its files (and .git folder) entries and the sub directories to walk '''
+        files = []
+        dirs = []
+        try:
+            with os.scandir(here) as it:
+                entries = list(it)
+        except OSError as e:
+            if self.on_error is None:
+                raise e
+            self.on_error(here, e)
+            return files, dirs
+
+        info = None
+        if any(e.name in Walker._INFO_FILES for e in entries):
+            info = IntelXInfo(here)
+            if len(info.info_list) == 0:
+                info = None
+
+        has_git = False
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    path = entry.path
+                    if entry.is_symlink():
+                        path = os.path.realpath(path)
+
+                    files.append(Walker.Entry(
+                        base_path=self.base_path,
+                        path=path,
+                        folder=here,
+                        container_path=self.container_path,
+                        info=info.get_info(Path(path)) if info is not None else None,
+                        dir_entry=entry if path == entry.path else None
+                    ))
+
+                elif entry.is_dir():
+                    path = entry.path
+                    if entry.is_symlink():
+                        if not self.follow_symlinks:
+                            continue
+
+                        path = os.path.realpath(path)
+
+                        # Avoid symlink loops pointing to an ancestor folder
+                        if here == path or here.startswith(path.rstrip(os.sep) + os.sep):
+                            continue
+
+                    if entry.name == '.git':
+                        has_git = True
+
+                    if not self.is_excluded(path):
+                        dirs.append(path)
+
+            except OSError as e:
+                if self.on_error is None:
+                    raise e
+                self.on_error(entry.path, e)
+
+        if has_git and self.git_support:
+            files.append(Walker.Entry(
+                base_path=self.base_path,
+                path=os.path.join(here, '.git'),
+                folder=here,
+                container_path=self.container_path,
+                is_git=True
+            ))
+
+        return files, dirs
+
+    def is_excluded(self, path: str) -> bool:
+        return self.exclude_matcher.is_excluded(path)
+
+
+class ParallelWalker(Walker):
+    ''' Walker listing many directories concurrently, used on high-latency filesystems (SMB, NFS etc) '''
+    threads = 4
+    max_queued = 10000
+
+    # Work stealing state
+    _queues = None
+    _pending = 0
+    _running = False
+    _cond = None
+    _out = None
+    _error = None
+
+    _DONE = object()
+
+    def __init__(self, base_path: [str, Path], excludes: [list, ExcludeMatcher] = None, git_support: bool = True,
+                 follow_symlinks: bool = True, container_path: CPath = None, on_error: Any = None,
+                 checkpoint: Checkpoint = None, threads: int = 4):
+        super().__init__(
+            base_path=base_path,
+            excludes=excludes,
+            git_support=git_support,
+            follow_symlinks=follow_symlinks,
+            container_path=container_path,
+            on_error=on_error,
+            checkpoint=checkpoint
+        )
+        self.threads = threads if threads > 1 else 1
+
+    def walk(self, path: [str, Path] = None, recursive: bool = True,
+             pending: list = None, partial: list = None) -> Iterator[Walker.Entry]:
+        if path is None:
+            path = self.base_path
+
+        if pending is None:
+            pending = [os.path.realpath(str(path))]
+
+        yield from self.scan_partial(partial)
+
+        self._queues = [deque() for _ in range(self.threads)]
+        for i, p in enumerate(pending):
+            self._queues[i % self.threads].append(p)
+        self._pending = len(pending)
+        self._running = True
+        self._error = None
+        self._cond = threading.Condition()
+        self._out = queue.Queue(maxsize=self.max_queued)
+
+        threads = []
+        for i in range(self.threads):
+            t = threading.Thread(target=self.__lister, kwargs=dict(index=i, recursive=recursive))
+            t.daemon = True
+            t.start()
+            threads.append(t)
+
+        try:
+            finished = 0
+            while finished < self.threads:
+                entry = self._out.get()
+                if entry is ParallelWalker._DONE:
+                    finished += 1
+                    continue
+
+                yield entry
+
+            if self._error is not None:
+                raise self._error
+
+        finally:
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+
+            # Unblock listers waiting for space at the output queue
+            while any(t.is_alive() for t in threads):
+                try:
+                    self._out.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+
+    def __get_dir(self, index: int) -> Optional[str]:
+        # Must be called with self._cond acquired
+        own = self._queues[index]
+        if len(own) > 0:
+            return own.pop()
+
+        # Steal the oldest (usually the biggest) subtree from the busiest lister
+        victim = max(self._queues, key=len)
+        if len(victim) > 0:
+            return victim.popleft()
+
+        return None
+
+    def __put(self, item) -> bool:
+        while self._running:
+            try:
+                self._out.put(item, timeout=0.3)
+                return True
+            except queue.Full:
+                pass
+
+        return False
+
+    def __lister(self, index: int, recursive: bool):
+        try:
+            while True:
+                with self._cond:
+                    here = None
+                    while self._running and self._pending > 0:
+                        here = self.__get_dir(index)
+                        if here is not None:
+                            break
+                        self._cond.wait(0.3)
+
+                    if here is None:
+                        return
+
+                try:
+                    (entries, dirs) = self.scan(here)
+                    if not recursive:
+                        dirs = []
+
+                    if self.checkpoint is not None:
+                        self.checkpoint.listed(here, entries, dirs)
+
+                    for e in entries:
+                        if not self.__put(e):
+                            return
+                except Exception as e:
+                    with self._cond:
+                        if self._error is None:
+                            self._error = e
+                        self._running = False
+                        self._cond.notify_all()
+                    return
+
+                with self._cond:
+                    if len(dirs) > 0:
+                        self._queues[index].extend(reversed(dirs))
+                        self._pending += len(dirs)
+                    self._pending -= 1
+                    self._cond.notify_all()
+
+        finally:
+            self._out.put(ParallelWalker._DONE)
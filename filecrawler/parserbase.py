@@ -1,13 +1,16 @@
+import codecs
 import json
 import os
 import importlib
 import pkgutil
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 from filecrawler.libs.file import File
 from filecrawler.libs.parser import Parser
+from filecrawler.libs.registry import Registry
+from filecrawler.libs.scanbudget import ScanBudget
 from filecrawler.rulebase import RuleBase
 from filecrawler.libs.color import Color
 from filecrawler.libs.logger import Logger
@@ -20,8 +23,14 @@ class ParserBase(object):
     extensions = []
     mime_types = []
 
+    # Parsed content is the raw file text, so the rules may scan the file directly in chunks
+    stream_scan = False
+
     #Static
     _parsers = {}
+    _by_mime = {}
+    _by_extension = {}
+    _default = None
 
     def __init__(self, name, description):
         self.name = name
@@ -30,35 +39,31 @@ class ParserBase(object):
 
     @classmethod
     def get_parser_instance(cls, file_extension: str, mime: str):
-        from filecrawler.parsers.default import DefaultParser
+        '''
+        Shared (stateless) parser of the file: first parser declaring the mime type,
+        then first parser declaring the extension, then the default parser
+        '''
+        cls.list_parsers()
 
-        if file_extension is None and mime is None:
-            return DefaultParser()
+        if mime is not None:
+            p = ParserBase._by_mime.get(mime.strip(' .').lower(), None)
+            if p is not None:
+                return p.get_instance()
 
-        if file_extension is None:
-            file_extension = ''
-        else:
-            file_extension = file_extension.strip()
+        if file_extension is not None:
+            p = ParserBase._by_extension.get(file_extension.strip(' .').lower(), None)
+            if p is not None:
+                return p.get_instance()
 
-        if mime is None:
-            mime = ''
-        else:
-            mime = mime.strip()
+        return cls.get_default_parser()
 
-        cls.list_parsers()
-        return next(
-            (
-                p.create_instance() for k, p in ParserBase._parsers.items()
-                if mime != '' and p.is_valid(extension='', mime=mime, mime_only=True)
-            )
-            , next(
-                (
-                    p.create_instance() for k, p in ParserBase._parsers.items()
-                    if file_extension != '' and p.is_valid(extension=file_extension)
-                )
-                , DefaultParser()
-            )
-        )
+    @classmethod
+    def get_default_parser(cls):
+        if ParserBase._default is None:
+            from filecrawler.parsers.default import DefaultParser
+            ParserBase._default = DefaultParser()
+
+        return ParserBase._default
 
     @classmethod
     def get_base_parsers(cls) -> str:
@@ -75,24 +80,40 @@ class ParserBase(object):
             if ParserBase._parsers is not None and len(ParserBase._parsers) > 0:
                 return ParserBase._parsers
 
+            from filecrawler.parsers import MANIFEST
+
             base_parser = ParserBase.get_base_parsers()
 
             parsers = {}
 
+            # Declared parsers are imported only when selected to a file
+            for p in MANIFEST:
+                parsers[p['name']] = Parser(
+                    name=p['name'].lower(),
+                    description=p['description'],
+                    parser=f'{base_parser}.{p["module"]}',
+                    qualname=p['qualname'],
+                    class_name=None,
+                    extensions=p['extensions'],
+                    mime_types=p['mime_types']
+                )
+
             base_path = os.path.join(
                 Path(__file__).resolve().parent, 'parsers'
             )
 
-            for loader, modname, ispkg in pkgutil.walk_packages([base_path]):
-                if not ispkg:
-                    if verbose:
-                        Color.pl('{?} Importing parser: %s' % f'{base_parser}.{modname}')
-                    importlib.import_module(f'{base_parser}.{modname}')
+            for modname in Registry.get_undeclared(base_path, MANIFEST):
+                if verbose:
+                    Color.pl('{?} Importing parser: %s' % f'{base_parser}.{modname}')
+                importlib.import_module(f'{base_parser}.{modname}')
 
             if verbose:
                 Logger.pl('')
 
             for iclass in ParserBase.__subclasses__():
+                if Registry.is_declared(iclass, base_parser, MANIFEST):
+                    continue
+
                 t = iclass()
                 if t.name in parsers:
                     raise Exception(f'Duplicated Parser name: {iclass.__module__}.{iclass.__qualname__}')
@@ -107,6 +128,19 @@ class ParserBase(object):
                     mime_types=t.mime_types
                 )
 
+            # Dispatch tables, the first parser (in priority order) declaring a mime type or extension wins
+            by_mime = {}
+            by_extension = {}
+            for p in parsers.values():
+                for m in p.mime_types:
+                    if m != '':
+                        by_mime.setdefault(m, p)
+                for e in p.extensions:
+                    if e != '':
+                        by_extension.setdefault(e, p)
+
+            ParserBase._by_mime = by_mime
+            ParserBase._by_extension = by_extension
             ParserBase._parsers = parsers
             return ParserBase._parsers
 
@@ -127,11 +161,11 @@ class ParserBase(object):
             ))
 
     @classmethod
-    def lookup_credentials(cls, data: [str, bytes]) -> Optional[dict]:
+    def lookup_credentials(cls, data: [str, bytes], budget: ScanBudget = None) -> Optional[dict]:
         if isinstance(data, bytes):
             data = data.decode("utf-8", "ignore")
 
-        detect = RuleBase.detect(data)
+        detect = RuleBase.detect(data, budget=budget)
         if detect is None:
             return None
 
@@ -141,6 +175,42 @@ class ParserBase(object):
 
         return detect
 
+    @classmethod
+    def read_chunks(cls, file: File, chunk_size: int = 2 ** 20) -> Iterator[str]:
+        ''' Decoded file text in chunks of chunk_size bytes '''
+        decoder = codecs.getincrementaldecoder('utf-8')('ignore')
+
+        if file.data is not None:
+            data = memoryview(file.data)
+            for i in range(0, len(data), chunk_size):
+                yield decoder.decode(data[i:i + chunk_size])
+        else:
+            with open(file.path, 'rb') as f:
+                block = f.read(chunk_size)
+                while len(block) != 0:
+                    yield decoder.decode(block)
+                    block = f.read(chunk_size)
+
+        yield decoder.decode(b'', final=True)
+
+    @classmethod
+    def lookup_credentials_stream(cls, file: File, budget: ScanBudget = None) -> Optional[dict]:
+        ''' Same as lookup_credentials, scanning the whole file in chunks with bounded memory '''
+        from filecrawler.config import Configuration
+
+        findings = {}
+        chunks = cls.read_chunks(file, Configuration.scan_chunk_size)
+        for rule, f in RuleBase.detect_stream(chunks, budget=budget):
+            findings.setdefault(rule.id, dict(name=str(rule), findings=[]))['findings'].append(f)
+
+        if len(findings) == 0:
+            return None
+
+        return dict(
+            credentials=findings,
+            has_credential=True
+        )
+
     @classmethod
     def ocr_file(cls, file: File) -> dict:
         from filecrawler.config import Configuration
@@ -190,11 +260,7 @@ class ParserBase(object):
         from filecrawler.config import Configuration
 
         if isinstance(file, File):
-            with open(file.path, 'rb') as f:
-                if Configuration.indexed_chars > 0:
-                    bData = f.read(Configuration.indexed_chars)
-                else:
-                    bData = f.read()
+            bData = file.read_bytes(Configuration.indexed_chars if Configuration.indexed_chars > 0 else -1)
         elif isinstance(file, bytes):
             bData = file
         else:
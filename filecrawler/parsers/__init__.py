@@ -0,0 +1,54 @@
+# Static manifest of the parsers, listed without importing them (see ParserBase.list_parsers).
+# The order is the parser selection priority. Keep in sync with the parser classes, checked by the test suite
+MANIFEST = [
+    dict(name='Certificate Parser', description='Parser for Certificate files',
+         module='certparser', qualname='CertificateParser',
+         extensions=['p8', 'key', 'p10', 'csr', 'cer', 'crl', 'p7c', 'crt', 'der', 'pem',
+                     'p12', 'pfx', 'p7b', 'spc', 'p7r'],
+         mime_types=[]),
+    dict(name='Default', description='Default parser',
+         module='default', qualname='DefaultParser',
+         extensions=[],
+         mime_types=[]),
+    dict(name='Image Parser', description='Parser for Image files',
+         module='imageparser', qualname='ImageParser',
+         extensions=['png', 'jpg', 'jpeg', 'gif', 'emf'],
+         mime_types=[]),
+    dict(name='Java Classes Parser', description='Parser for Java Classes files',
+         module='javaparser', qualname='JavaParser',
+         extensions=[],
+         mime_types=['application/x-java-applet']),
+    dict(name='JSON Parser', description='Parser for JSON files',
+         module='jsonparser', qualname='JsonParser',
+         extensions=['json'],
+         mime_types=['application/json']),
+    dict(name='Document Parser', description='Parser for Document files',
+         module='officeparser', qualname='OfficeParser',
+         extensions=['doc', 'docx', 'ppt', 'pptx', 'xls', 'xlsx', 'odt', 'xlsm', 'xltm', 'xlsb'],
+         mime_types=['application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                     'application/vnd.openxmlformats-officedocument.wordprocessingml.document']),
+    dict(name='PCAP Parser', description='Parser for PCAP files',
+         module='pcapparser', qualname='PcapParser',
+         extensions=['pcap', 'pcapx'],
+         mime_types=['application/vnd.tcpdump.pcap']),
+    dict(name='PDF Parser', description='Parser for PDF files',
+         module='pdfparser', qualname='PDFParser',
+         extensions=['pdf'],
+         mime_types=[]),
+    dict(name='Virtual Disk Parser', description='Parser for Virtual Disk files',
+         module='vdiskparser', qualname='VDiskParser',
+         extensions=['vmdk', 'vhd', 'vhdx'],
+         mime_types=[]),
+    dict(name='Windows Bin Parser', description='Parser for Windows Bin files',
+         module='windowsbinparser', qualname='WindowsBinParser',
+         extensions=['exe', 'dll', 'ocx'],
+         mime_types=['application/vnd.microsoft.portable-executable']),
+    dict(name='XML Parser', description='Parser for XML files',
+         module='xmlparser', qualname='XMLParser',
+         extensions=['xml'],
+         mime_types=['text/xml']),
+    dict(name='YAML Parser', description='Parser for YAML files',
+         module='yamlparser', qualname='YamlParser',
+         extensions=['yml', 'yaml'],
+         mime_types=[]),
+]
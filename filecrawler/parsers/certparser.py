@@ -11,7 +11,7 @@ class CertificateParser(ParserBase):
 
     def parse(self, file: File) -> dict:
         data = {'content': self.get_readable_data(file)}
-        return self._parse(data, file.path.read_bytes())
+        return self._parse(data, file.read_bytes())
 
     def parse_from_bytes(self, file_data: bytes) -> dict:
         data = {'content': self.get_readable_data(file_data)}
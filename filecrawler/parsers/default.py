@@ -3,6 +3,7 @@ from filecrawler.parserbase import ParserBase
 
 
 class DefaultParser(ParserBase):
+    stream_scan = True
 
     def __init__(self):
         super().__init__('Default', 'Default parser')
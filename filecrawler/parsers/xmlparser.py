@@ -19,9 +19,8 @@ class XMLParser(ParserBase):
 
         if Configuration.xml_support:
             try:
-                with open(file.path, 'r') as xml_file:
-                    data_dict = xmltodict.parse(xml_file.read())
-                    data['object_content'] = json.loads(data_dict)
+                data_dict = xmltodict.parse(file.read_bytes())
+                data['object_content'] = json.loads(data_dict)
             except:
                 pass
 
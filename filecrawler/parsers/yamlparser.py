@@ -17,9 +17,8 @@ class YamlParser(ParserBase):
         data = {'content': self.get_readable_data(file)}
 
         try:
-            with open(file.path, 'r') as f:
-                tmp = dict(yaml.load(f, Loader=yaml.FullLoader))
-                data['object_content'] = json.dumps(tmp, sort_keys=False, indent=2)
+            tmp = dict(yaml.load(file.read_bytes(), Loader=yaml.FullLoader))
+            data['object_content'] = json.dumps(tmp, sort_keys=False, indent=2)
         except:
             pass
 
@@ -5,12 +5,24 @@ import os
 import importlib
 import pkgutil
 import re
+import sys
+import threading
+import time
 from pathlib import Path
 from re import Pattern
-from typing import Iterator, Optional, TypeVar
+from typing import Iterable, Iterator, Optional, TypeVar
 
-from filecrawler._exceptions import FalsePositiveError
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
+from filecrawler._exceptions import FalsePositiveError, ScanTimeoutError
 from filecrawler.libs.rule import Rule
+from filecrawler.libs.ruleset import RuleSet
+from filecrawler.libs.scanbudget import ScanBudget
 from filecrawler.libs.color import Color
 from filecrawler.libs.logger import Logger
 
@@ -53,8 +65,21 @@ class RuleBase(object):
     _exclude_keywords = []
     _severity = 70
 
+    # Longest text matched by _regex, declared by rules whose matches always contain one of the keywords.
+    # Allows the regex to run only at windows around the keyword positions (0 = whole text)
+    _max_match_length = 0
+
+    # Lowercase keywords, filled by compile
+    _l_keywords = None
+    _l_exclude_keywords = None
+
+    # Hash of the rule sources already validated (true/false positive self tests)
+    validation_cache_file = '~/.filecrawler/rules_validated.json'
+
     # Static
     _rules = {}
+    _ruleset = None
+    _ruleset_lock = threading.Lock()
 
     def __init__(self, id: str, name: str):
         self._name = name
@@ -85,6 +110,10 @@ class RuleBase(object):
     def keywords(self) -> Iterator[str]:
         return self._keywords
 
+    @property
+    def max_match_length(self) -> int:
+        return self._max_match_length
+
     @classmethod
     def get_base_rule(cls) -> str:
         file = Path(__file__).stem
@@ -94,7 +123,10 @@ class RuleBase(object):
         return '.'.join((parent_module, 'rules'))
 
     @classmethod
-    def list_rules(cls, verbose: int = 0) -> dict:
+    def list_rules(cls, verbose: int = 0, force_validation: bool = False) -> dict:
+        '''
+        force_validation: run the true/false positive self tests of every rule, ignoring the validation cache
+        '''
 
         if RuleBase._rules is not None and len(RuleBase._rules) > 0:
             return RuleBase._rules
@@ -116,6 +148,9 @@ class RuleBase(object):
         if verbose:
             Logger.pl('')
 
+        cache = {} if force_validation else RuleBase.load_validation_cache()
+        validated = {}
+
         for iclass in RuleBase.__subclasses__():
             if verbose >= 2:
                 Color.pl('{?} Loading rule: %s' % f'{iclass.__module__}.{iclass.__qualname__}')
@@ -124,7 +159,14 @@ class RuleBase(object):
                 if t.id in rules:
                     raise Exception(f'Duplicated rule id [{t.id}]: {iclass.__module__}.{iclass.__qualname__}')
 
-                t.validate(verbose)
+                source_hash = RuleBase.get_source_hash(iclass)
+                if source_hash is None or cache.get(t.id, None) != source_hash:
+                    t.validate(verbose)
+                elif verbose >= 2:
+                    Color.pl('{?} Rule validation cached: %s' % t.id)
+
+                if source_hash is not None:
+                    validated[t.id] = source_hash
 
                 rules[t.id] = Rule(
                     id=t.id,
@@ -141,9 +183,60 @@ class RuleBase(object):
                 if not Configuration.continue_on_error:
                     raise e
 
+        if validated != cache:
+            RuleBase.save_validation_cache(validated)
+
         RuleBase._rules = rules
         return RuleBase._rules
 
+    @classmethod
+    def get_source_hash(cls, iclass) -> Optional[str]:
+        '''
+        Hash of the rule module source, together with the rule base, rule set and keyword matcher sources
+        and the python version (all of them also change the rule behavior)
+        '''
+        from filecrawler.libs.keywordmatcher import KeywordMatcher
+
+        try:
+            hashsum = hashlib.sha1()
+            hashsum.update(sys.version.encode('utf-8'))
+            for file_name in (__file__, sys.modules[RuleSet.__module__].__file__,
+                              sys.modules[KeywordMatcher.__module__].__file__,
+                              sys.modules[iclass.__module__].__file__):
+                with open(file_name, 'rb') as f:
+                    hashsum.update(f.read())
+
+            return hashsum.hexdigest()
+        except Exception:
+            return None
+
+    @classmethod
+    def load_validation_cache(cls) -> dict:
+        try:
+            with open(Path(RuleBase.validation_cache_file).expanduser(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            if isinstance(data, dict):
+                return data
+        except Exception:
+            pass
+
+        return {}
+
+    @classmethod
+    def save_validation_cache(cls, data: dict):
+        try:
+            file_name = Path(RuleBase.validation_cache_file).expanduser()
+            file_name.parent.mkdir(parents=True, exist_ok=True)
+
+            # Atomic replace, other processes may be reading or writing it
+            tmp_name = file_name.with_name(f'{file_name.name}.{os.getpid()}.tmp')
+            with open(tmp_name, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_name, file_name)
+        except Exception:
+            pass
+
     def validate(self, verbose: int = 0):
         for tp in self._tps:
             r = self.run(tp)
@@ -177,24 +270,29 @@ class RuleBase(object):
                 raise Exception(f'Failed to validate (fp) [{self.id}]')
 
     @classmethod
-    def detect(cls, text: str) -> Optional[dict]:
+    def get_ruleset(cls) -> RuleSet:
+        if RuleBase._ruleset is not None:
+            return RuleBase._ruleset
+
+        with RuleBase._ruleset_lock:
+            if RuleBase._ruleset is None:
+                RuleBase._ruleset = RuleSet(cls.list_rules())
+
+        return RuleBase._ruleset
+
+    @classmethod
+    def detect(cls, text: str, budget: ScanBudget = None) -> Optional[dict]:
         '''
         Run rule defined by inherited class
         '''
-        cls.list_rules()
+        return cls.get_ruleset().detect(text, budget=budget)
 
-        findings = {}
-        for k, rule in cls._rules.items():
-            inst = rule.create_instance()
-            ret = inst.run(text)
-            if ret is not None and len(ret) > 0:
-                findings.update({inst.id: dict(name=str(inst), findings=ret)})
-            del inst
-
-        if len(findings) == 0:
-            return None
-
-        return dict(credentials=findings)
+    @classmethod
+    def detect_stream(cls, chunks: Iterable[str], budget: ScanBudget = None) -> Iterator[tuple]:
+        '''
+        Run the rules over text chunks, yielding (rule, finding) with the absolute offset of each finding
+        '''
+        yield from cls.get_ruleset().scan(chunks, budget=budget)
 
     @classmethod
     def generate_sample_secret(cls, identifier: str, secret: str) -> str:
@@ -227,6 +325,15 @@ class RuleBase(object):
         import exrex
         return exrex.getone(regex)
 
+    @classmethod
+    def max_length(cls, regex: Pattern) -> int:
+        ''' Longest text the regex can match, lookarounds not included '''
+        (_, width) = sre_parse.parse(regex.pattern, regex.flags).getwidth()
+        if width >= sre_constants.MAXREPEAT:
+            raise Exception(f'The regexp [{regex.pattern}] has no maximum match length')
+
+        return width
+
     @classmethod
     def numeric(cls, size: [str, int]):
         return r'[0-9]{%s}' % size
@@ -282,44 +389,75 @@ class RuleBase(object):
 
         return ent
 
-    def run(self, text: str, verbose: bool = False) -> Optional[list]:
+    def compile(self):
+        ''' Prepare the keyword lists once, before the instance is shared by the RuleSet '''
+        if self._exclude_keywords is None:
+            self._exclude_keywords = []
+
+        self._l_keywords = [k.lower() for k in (self._keywords if self._keywords is not None else [])]
+        self._l_exclude_keywords = [x.lower() for x in self._exclude_keywords]
+
+    def run(self, text: str, verbose: bool = False, l_text: str = None, matches: list = None,
+            windowed: bool = False, stats: dict = None, deadline: float = None,
+            positions: dict = None) -> Optional[list]:
+        '''
+        matches: keyword positions already found by the RuleSet keyword prefilter
+        windowed: run the regex only around the keyword positions, when the rule declares _max_match_length
+        stats: RuleStats row receiving the regex match count and the false positive drops
+        deadline: time.perf_counter() value to give up, raising ScanTimeoutError
+        positions: receives the start offsets of every occurrence of each match (match: [start, ...])
+        '''
         # Pré filter
         if self._keywords is None or len(self._keywords) == 0:
             if verbose:
                 Color.pl('{?} {W}Keywords array is empty found to {O}%s{W}\n' % self.id)
             return None
 
-        if self._exclude_keywords is None:
-            self._exclude_keywords = []
+        if self._l_keywords is None:
+            self.compile()
 
         if verbose:
             Color.pl('{?} {W}Keywords: {O}%s{W}\n' % ', '.join(self._keywords))
 
-        l_text = text.lower()
-        if not any([
-            k for k in self._keywords
-            if k.lower() in l_text
-        ]):
-            if verbose:
-                Color.pl('{?} {W}None keywords found to {O}%s{W} at text {O}%s{W}\n' % (self.id, text))
-            return None
+        if matches is None:
+            if l_text is None:
+                l_text = text.lower()
+
+            if not any(k in l_text for k in self._l_keywords):
+                if verbose:
+                    Color.pl('{?} {W}None keywords found to {O}%s{W} at text {O}%s{W}\n' % (self.id, text))
+                return None
 
         findings = []
 
         if self._regex is None and verbose:
             Color.pl('{?} {W}Regex is empty.\n')
 
-        for f in self.run_regex(text, self._regex, verbose):
+        windows = None
+        if windowed and matches is not None and (l_text is None or len(l_text) == len(text)):
+            windows = self.get_windows(len(text), matches)
+
+        starts = [] if positions is not None else None
+        for i, f in enumerate(self.run_regex(text, self._regex, verbose, windows=windows, deadline=deadline,
+                                             starts=starts)):
+            if f is not None and positions is not None:
+                positions.setdefault(f, []).append(starts[i])
+
             if f is not None and f not in findings:
-                ignore = next((True for x in self._exclude_keywords if x.lower() in f.lower()), False)
+                l_f = f.lower()
+                ignore = next((True for x in self._l_exclude_keywords if x in l_f), False)
                 if not ignore:
                     findings.append(f)
 
         if len(findings) == 0:
             return None
 
+        matched = len(findings)
+        if stats is not None:
+            stats['matches'] += matched
+
         try:
-            fp = self.run_regex(text, self._fp_regex, verbose)
+            fp = self.run_regex(text, self._fp_regex, verbose, deadline=deadline)
             if len(fp) > 0:
                 findings = [
                     f for f in findings
@@ -334,17 +472,23 @@ class RuleBase(object):
                 if len(self.run_regex(f, self._fp_regex, verbose)) == 0
             ]
 
+            if len(findings) > 0:
+                findings = [
+                    p for f in findings
+                    if (p := self._post_processor(text, f)) is not None
+                ]
+
+            if stats is not None:
+                stats['fp_drops'] += matched - len(findings)
+
             if len(findings) == 0:
                 return None
 
-            findings = [
-                p for f in findings
-                if (p := self._post_processor(text, f)) is not None
-            ]
-
             return findings
 
         except FalsePositiveError:
+            if stats is not None:
+                stats['fp_drops'] += matched
             return None
 
     def _post_processor(self, text: str, match: str) -> Optional[dict]:
@@ -367,21 +511,71 @@ class RuleBase(object):
         data.update(dict(fingerprint=sha1sum.hexdigest()))
         return data
 
-    def run_regex(self, text: str, regex: Pattern, verbose: bool = False) -> list:
+    def get_windows(self, size: int, matches: list) -> Optional[list]:
+        '''
+        Merged (start, end) text windows holding every match of _regex, given the keyword positions.
+        A match containing the keyword [ks, ke) starts after ke - max and ends before ks + max
+        '''
+        if self._max_match_length <= 0 or matches is None:
+            return None
+
+        windows = []
+        for (ks, ke) in sorted(matches):
+            start = max(0, ke - self._max_match_length)
+            end = min(size, max(ke, ks + self._max_match_length))
+            if len(windows) > 0 and start <= windows[-1][1]:
+                if end > windows[-1][1]:
+                    windows[-1] = (windows[-1][0], end)
+            else:
+                windows.append((start, end))
+
+        # Not worth it when the keywords are everywhere
+        if sum(end - start for (start, end) in windows) > size // 2:
+            return None
+
+        return windows
+
+    def _finditer(self, text: str, regex: Pattern, windows: list = None, deadline: float = None):
+        if windows is None:
+            windows = [(0, None)]
+
+        for (start, end) in windows:
+            # Extra chars after the window keep lookaheads (and $) working as at the whole text,
+            # and matches ending after the window do not exist at the whole text
+            it = regex.finditer(text) if end is None else regex.finditer(text, start, end + self._max_match_length)
+            for m in it:
+                if end is not None and m.end() > end:
+                    break
+                if deadline is not None and time.perf_counter() > deadline:
+                    raise ScanTimeoutError(f'Scan budget exceeded by rule [{self.id}]')
+                yield m
+
+            if deadline is not None and time.perf_counter() > deadline:
+                raise ScanTimeoutError(f'Scan budget exceeded by rule [{self.id}]')
+
+    def run_regex(self, text: str, regex: Pattern, verbose: bool = False, windows: list = None,
+                  deadline: float = None, starts: list = None) -> list:
+        '''
+        starts: receives the start offset of each finding, at the same order
+        '''
         findings = []
 
         if regex is None:
             return findings
 
-        for m in regex.finditer(text):
+        for m in self._finditer(text, regex, windows, deadline):
             if verbose:
                 Color.pl('{?} {W}Match: {O}%s{W}\n' % m)
             f = None
+            group = 0
             if self._secret_group == 0 and len(m.groups()) == 0:
                 f = m[0]
             elif len(m.groups()) >= self._secret_group:
-                f = m.group(self._secret_group)
+                group = self._secret_group
+                f = m.group(group)
 
             findings.append(f)
+            if starts is not None:
+                starts.append(m.start(group))
 
         return findings
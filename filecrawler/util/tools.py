@@ -7,6 +7,7 @@ import platform
 import string, random, sys, re
 import subprocess
 import tempfile
+import threading
 import time
 from email.message import EmailMessage
 
@@ -14,11 +15,27 @@ import unicodedata
 import email
 from pathlib import Path
 
-from tabulate import tabulate
 from filecrawler.libs.color import Color
 
 
 class Tools:
+    # libmagic handles are not shared between threads and load the magic database once
+    _magic = threading.local()
+    _mimetypes_loaded = False
+
+    # Extensions trusted without calling libmagic, when the content has no NUL bytes
+    _TEXT_EXTENSIONS = {
+        'txt': 'text/plain',
+        'log': 'text/plain',
+        'md': 'text/plain',
+        'csv': 'text/plain',
+        'ini': 'text/plain',
+        'cfg': 'text/plain',
+        'conf': 'text/plain',
+        'yml': 'text/plain',
+        'yaml': 'text/plain',
+        'json': 'application/json',
+    }
 
     def __init__(self):
         pass
@@ -109,6 +126,7 @@ class Tools:
 
     @staticmethod
     def get_tabulated(data: list) -> str:
+        from tabulate import tabulate
 
         if len(data) == 0:
             return ''
@@ -249,6 +267,30 @@ class Tools:
     def to_boolean(text: [str, bool]) -> bool:
         return bool(text)
 
+    @staticmethod
+    def parse_size(text: [str, int]) -> int:
+        ''' Size in bytes of texts like 500, 500K, 10M or 1G '''
+        if isinstance(text, int):
+            return text
+
+        x = re.fullmatch(r'([0-9]+)\s*([kmg]?)b?', str(text).strip().lower())
+        if x is None:
+            raise ValueError(f'invalid size: {text}')
+
+        return int(x.group(1)) * {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}[x.group(2)]
+
+    @staticmethod
+    def parse_interval(text: [str, int, float]) -> float:
+        ''' Interval in seconds of texts like 2, 2s, 500ms, 5m or 1h '''
+        if isinstance(text, (int, float)):
+            return float(text)
+
+        x = re.fullmatch(r'([0-9]+(?:\.[0-9]+)?)\s*(ms|s|m|h)?', str(text).strip().lower())
+        if x is None:
+            raise ValueError(f'invalid interval: {text}')
+
+        return float(x.group(1)) * {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}[x.group(2) or 's']
+
     @staticmethod
     def get_email_date(msg: EmailMessage) -> datetime.datetime:
         try:
@@ -256,11 +298,18 @@ class Tools:
         except:
             return datetime.datetime.now()
 
+    @staticmethod
+    def init_mimetypes():
+        import mimetypes
+        if not Tools._mimetypes_loaded:
+            mimetypes.init()
+            Tools._mimetypes_loaded = True
+
     @staticmethod
     def guess_extension(file_path: str) -> str:
         try:
             import mimetypes
-            mimetypes.init()
+            Tools.init_mimetypes()
             ext = mimetypes.guess_extension(Tools.get_mime(file_path), strict=True)
             if ext is None:
                 return ".bin"
@@ -273,7 +322,7 @@ class Tools:
     def guess_extensions(data: [str, bytes]) -> str:
         try:
             import mimetypes
-            mimetypes.init()
+            Tools.init_mimetypes()
             ext = mimetypes.guess_extension(Tools.get_mimes(data), strict=True)
             if ext is None:
                 return ".bin"
@@ -283,25 +332,40 @@ class Tools:
             return ".bin"
 
     @staticmethod
-    def get_mime(file_path: str) -> str:
-        return Tools.get_mimes(open(file_path, "rb").read(2048))
-
-    @staticmethod
-    def get_mimes(data: [str, bytes]) -> str:
+    def get_magic():
         import magic
         from filecrawler.config import Configuration
 
+        f = getattr(Tools._magic, 'instance', None)
+        if f is None:
+            p = platform.system().lower()
+            if p == 'windows':
+                f = magic.Magic(mime=True, magic_file=os.path.join(Configuration.lib_path, 'libmagic_windows', 'magic.mgc'))
+            else:
+                f = magic.Magic(mime=True)
+            Tools._magic.instance = f
+
+        return f
+
+    @staticmethod
+    def get_mime(file_path: str, extension: str = None) -> str:
+        with open(file_path, "rb") as f:
+            return Tools.get_mimes(f.read(2048), extension=extension)
+
+    @staticmethod
+    def get_mimes(data: [str, bytes], extension: str = None) -> str:
         if isinstance(data, str):
             data = data.encode('utf-8', 'ignore')
 
         if len(data) > 2048:
             data = data[:2048]
 
-        p = platform.system().lower()
-        if p == 'windows':
-            f = magic.Magic(mime=True, magic_file=os.path.join(Configuration.lib_path, 'libmagic_windows', 'magic.mgc'))
-        else:
-            f = magic.Magic(mime=True)
+        if extension is not None and len(data) > 0:
+            mime = Tools._TEXT_EXTENSIONS.get(extension.lower().strip('. '), None)
+            if mime is not None and b'\x00' not in data:
+                return mime
+
+        f = Tools.get_magic()
 
         try:
             return f.from_buffer(data).lower()